@@ -0,0 +1,334 @@
+"""
+Offline benchmark of the Renovate update-check pipeline.
+
+Runs local stand-ins for orbispatches.com and a Discord webhook, then drives
+full update cycles for growing title lists and writes the measurements to a
+JSON file so results can be compared across versions.
+
+    python benchmarks/bench_renovate.py --titles 1,10,100,1000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+
+from updatechecker import utils
+from updatechecker.client import pool
+from updatechecker.renovate import Renovate
+from updatechecker.scheduler import Scheduler
+from updatechecker.webhook import dispatcher
+
+
+class Upstream:
+    """Shared behaviour and counters of the fake servers."""
+
+    def __init__(
+        self: Any, latency: float, errorRate: float, rateLimitRate: float
+    ) -> None:
+        self.latency: float = latency
+        self.errorRate: float = errorRate
+        self.rateLimitRate: float = rateLimitRate
+        self.versions: Dict[str, str] = {}
+        self.lookups: int = 0
+        self.notModified: int = 0
+        self.posts: int = 0
+        self.embeds: int = 0
+        self.rateLimited: int = 0
+        self.errors: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    def Count(self: Any, name: str, amount: int = 1) -> None:
+        with self.lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+
+def Handler(upstream: Upstream) -> type:
+    class FakeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self: Any, *args: Any) -> None:
+            pass
+
+        def _Reply(
+            self: Any, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None
+        ) -> None:
+            self.send_response(status)
+
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self: Any) -> None:
+            time.sleep(upstream.latency)
+            upstream.Count("lookups")
+
+            if random.random() < upstream.errorRate:
+                upstream.Count("errors")
+
+                return self._Reply(503)
+
+            titleId: str = parse_qs(urlsplit(self.path).query).get("titleid", [""])[0]
+            version: str = upstream.versions.get(titleId, "01.00")
+            etag: str = f'"{titleId}-{version}"'
+
+            if self.headers.get("if-none-match") == etag:
+                upstream.Count("notModified")
+
+                return self._Reply(304, headers={"etag": etag})
+
+            body: bytes = json.dumps(
+                {
+                    "success": True,
+                    "metadata": {
+                        "name": f"Title {titleId}",
+                        "currentVersion": version,
+                        "region": "EU",
+                        "icon": None,
+                    },
+                }
+            ).encode()
+
+            self._Reply(200, body, {"etag": etag, "content-type": "application/json"})
+
+        def do_POST(self: Any) -> None:
+            body: Dict[str, Any] = json.loads(
+                self.rfile.read(int(self.headers["content-length"]))
+            )
+
+            time.sleep(upstream.latency)
+            upstream.Count("posts")
+
+            if random.random() < upstream.rateLimitRate:
+                upstream.Count("rateLimited")
+
+                return self._Reply(
+                    429,
+                    json.dumps({"retry_after": 0.05}).encode(),
+                    {"content-type": "application/json"},
+                )
+
+            upstream.Count("embeds", len(body["embeds"]))
+
+            self._Reply(
+                204,
+                headers={"x-ratelimit-remaining": "4", "x-ratelimit-reset-after": "0.1"},
+            )
+
+    return FakeHandler
+
+
+class LoopMonitor:
+    """Measure how late the event loop wakes up a periodic sleeper."""
+
+    def __init__(self: Any, interval: float = 0.01) -> None:
+        self.interval: float = interval
+        self.blocked: float = 0.0
+        self.worst: float = 0.0
+
+    async def Run(self: Any) -> None:
+        while True:
+            start: float = time.perf_counter()
+
+            await asyncio.sleep(self.interval)
+
+            lag: float = time.perf_counter() - start - self.interval
+
+            if lag > 0:
+                self.blocked += lag
+                self.worst = max(self.worst, lag)
+
+
+async def Cycle(renovate: Renovate) -> Dict[str, float]:
+    """Run one update cycle with every title due and measure it."""
+
+    monitor: LoopMonitor = LoopMonitor()
+    sampler: asyncio.Task = asyncio.create_task(monitor.Run())
+
+    # A fresh scheduler makes every configured title due immediately
+    renovate.ReloadConfig()
+    renovate.scheduler = Scheduler(renovate.config.get("schedule"))
+
+    start: float = time.perf_counter()
+
+    await renovate.Initialize()
+    await renovate.Deliver()
+
+    wall: float = time.perf_counter() - start
+
+    sampler.cancel()
+
+    return {
+        "wall": wall,
+        "loopBlocked": monitor.blocked,
+        "loopWorstLag": monitor.worst,
+    }
+
+
+async def Scenario(
+    titles: int, upstream: Upstream, base: str, args: argparse.Namespace, directory: str
+) -> Dict[str, Any]:
+    """Measure a cold, a steady-state and an update cycle for a title count."""
+
+    ids: List[str] = [f"CUSA{index:05d}" for index in range(titles)]
+    configPath: str = os.path.join(directory, f"config-{titles}.json")
+
+    with open(configPath, "w") as file:
+        json.dump(
+            {
+                "titles": {"orbis": ids},
+                "endpoints": {"orbis": base},
+                "historyPath": os.path.join(directory, f"history-{titles}.db"),
+                "concurrency": args.concurrency,
+                "discord": {"username": "Benchmark", "webhookUrl": f"{base}/webhook"},
+            },
+            file,
+        )
+
+    renovate: Renovate = Renovate(configPath)
+    result: Dict[str, Any] = {"titles": titles}
+
+    for name in ["cold", "steady", "updates"]:
+        if name == "updates":
+            for titleId in random.sample(ids, max(int(titles * args.update_rate), 1)):
+                upstream.versions[titleId] = "01.01"
+
+        before: Dict[str, int] = dict(vars(upstream))
+
+        # tracemalloc slows the cycle down considerably, so it is opt-in
+        if args.trace_memory:
+            tracemalloc.start()
+
+        measured: Dict[str, float] = await Cycle(renovate)
+
+        if args.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        requests: int = (upstream.lookups - before["lookups"]) + (
+            upstream.posts - before["posts"]
+        )
+
+        result[name] = {
+            **{key: round(value, 4) for key, value in measured.items()},
+            "requests": requests,
+            "requestsPerSecond": round(requests / measured["wall"], 1),
+            "notModified": upstream.notModified - before["notModified"],
+            "webhookPosts": upstream.posts - before["posts"],
+            "embedsDelivered": upstream.embeds - before["embeds"],
+            "rateLimited": upstream.rateLimited - before["rateLimited"],
+            "upstreamErrors": upstream.errors - before["errors"],
+            "maxRssKiB": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+
+        if args.trace_memory:
+            result[name]["peakTracedMemoryKiB"] = round(peak / 1024, 1)
+
+        print(f"{titles:>5} titles {name:<8} {json.dumps(result[name])}")
+
+    renovate.store.Close()
+
+    return result
+
+
+async def Main(args: argparse.Namespace) -> Dict[str, Any]:
+    upstream: Upstream = Upstream(args.latency, args.error_rate, args.rate_limit_rate)
+
+    server: ThreadingHTTPServer = ThreadingHTTPServer(("127.0.0.1", 0), Handler(upstream))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    base: str = f"http://127.0.0.1:{server.server_port}"
+
+    # Keep failure paths fast enough to benchmark
+    utils.RETRY_DELAY = args.retry_delay
+    dispatcher.linger = args.linger
+    dispatcher.backoff = args.retry_delay
+
+    scenarios: List[Dict[str, Any]] = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for titles in args.titles:
+            scenarios.append(await Scenario(titles, upstream, base, args, directory))
+
+    await pool.AsyncClose()
+    server.shutdown()
+
+    return {
+        "benchmark": "renovate",
+        "timestamp": time.time(),
+        "commit": Commit(),
+        "python": platform.python_version(),
+        "parameters": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        "maxRssKiB": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "httpPool": pool.Stats()["reuseRatio"],
+        "scenarios": scenarios,
+    }
+
+
+def Commit() -> Optional[str]:
+    """Return the current git commit, if available."""
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--titles",
+        type=lambda value: [int(count) for count in value.split(",")],
+        default=[1, 10, 100, 1000],
+        help="comma separated title counts (default: 1,10,100,1000)",
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per upstream request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of lookups answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of webhook posts answered with 429")
+    parser.add_argument("--update-rate", type=float, default=0.1, help="share of titles updated in the update cycle")
+    parser.add_argument("--concurrency", type=int, default=4, help="Renovate lookup concurrency")
+    parser.add_argument("--retry-delay", type=float, default=0.05, help="retry delay used instead of the default")
+    parser.add_argument("--linger", type=float, default=0.05, help="webhook batching window")
+    parser.add_argument("--output", default="bench_results.json", help="machine readable result file")
+    parser.add_argument("--trace-memory", action="store_true", help="report tracemalloc peaks, slows cycles down")
+    parser.add_argument("--seed", type=int, default=0)
+
+    args: argparse.Namespace = parser.parse_args()
+
+    random.seed(args.seed)
+    logging.basicConfig(level=logging.ERROR)
+
+    results: Dict[str, Any] = asyncio.run(Main(args))
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=4)
+
+    print(f"Wrote {args.output}")
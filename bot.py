@@ -4,11 +4,19 @@
 import logging
 import sys
 import os
+import time
 sys.path.append(os.path.join(sys.path[0], 'f1o', 'updatechecker'))
-from f1o import commands
+
+from f1o import config
+
+config.load_config()
 
 logger = logging.getLogger(__name__)
 logger.warning('Starting bot...')
 
-commands.bot.run(os.getenv('BOT_TOKEN'))
+# Run with python -X importtime bot.py for a per-module breakdown
+start = time.perf_counter()
+from f1o import commands
+logger.info(f'Imported commands in {(time.perf_counter() - start) * 1000:.0f} ms')
 
+commands.bot.run(os.getenv('BOT_TOKEN'), log_handler=None)
@@ -1,54 +1,375 @@
 import asyncio
 
 import discord
-from discord import Activity, ActivityType, Embed, Colour
+from discord import Activity, ActivityType, Embed, Colour, app_commands
 from discord.ext import commands
 from discord.ext import tasks
 
+import hashlib
+import json
 import logging
+import math
+import re
 import time
+from datetime import datetime, timezone
 
-from f1o.config import PREFIX, VERSION, STAGE
-from f1o.util import check_f1owebite_status
-from updatechecker.renovate import Renovate
+from f1o.config import (
+    PREFIX, VERSION, STAGE,
+    F1O_WEBSITE_URL, WEBSITE_PROBE_INTERVAL, WEBSITE_PROBE_TIMEOUT, LEAGUES_FILE,
+    UPDATE_CHECK_TICK, LOOP_LAG_INTERVAL, LOOP_BLOCK_THRESHOLD,
+    METRICS_HOST, METRICS_PORT, APP_INFO_TTL, STATUS_COOLDOWN,
+    STANDINGS_TTL, STANDINGS_REFRESH_INTERVAL, RESULTS_DIR, RESULTS_REFRESH_INTERVAL,
+    LEADER_LEASE_FILE, LEADER_LEASE_TTL, LEADER_RENEW_INTERVAL,
+    AUTO_SHARD, SHARD_COUNT, SHARD_IDS, CACHE_PROFILES, CACHE_PROFILE,
+    WARM_STATE_FILE, WARM_STATE_INTERVAL, OUTBOX_TICK
+)
+from f1o.leader import LeaderLease
+from f1o.leagues import LeagueRegistry
+from f1o.metrics import MetricsServer
+from f1o.monitor import CommandStats, LatencyHistogram, LoopLagMonitor
+from f1o.results import ResultsEngine
+from f1o.snapshot import WarmState
+from f1o.standings import StandingsCache
+from f1o.util import (
+    Coalescer, TTLCached, WebsiteProbe, check_f1owebite_status, client, resident_memory
+)
+from updatechecker.timeline import TimelineReader
 
 logger = logging.getLogger(__name__)
 
 # Store the message target
 target = None
 
-intents = discord.Intents.default()
+# Last known state of the F1O website, refreshed by probe_f1o_website
+website_probe = WebsiteProbe(F1O_WEBSITE_URL, timeout=WEBSITE_PROBE_TIMEOUT)
+
+# Leagues and league channels of the current stage
+league_registry = LeagueRegistry(LEAGUES_FILE, STAGE)
+
+# Parsed league standings, refreshed by refresh_standings
+standings_cache = StandingsCache(league_registry, ttl=STANDINGS_TTL)
+
+# Race results of all leagues, extended by ingest_results
+results_engine = ResultsEngine(league_registry, RESULTS_DIR)
+
+# Update checker, keeps its config and title history between cycles. Only
+# imported by the process that runs it, see get_renovate
+renovate = None
+
+# Patch timeline read from the history store, in every process
+patch_timeline = TimelineReader()
+
+# Restored on startup and saved on an interval and at shutdown
+warm_state = WarmState(WARM_STATE_FILE)
+restored_state = {}
+
+# Elects the one process that runs the update checker
+leader_lease = LeaderLease(LEADER_LEASE_FILE, 'renovate', ttl=LEADER_LEASE_TTL)
+
+# Event loop lag and per-command latency
+loop_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL, LOOP_BLOCK_THRESHOLD)
+command_stats = CommandStats()
+
+cache_profile = CACHE_PROFILES[CACHE_PROFILE]
+
+if cache_profile['intents'] == 'minimal':
+    # Commands only need their channel and guild, and the messages invoking them
+    intents = discord.Intents.none()
+    intents.guilds = True
+else:
+    intents = discord.Intents.default()
 intents.messages = True
-intents.members = True
-if STAGE == 'DEV':
-    intents.message_content = True
+intents.members = cache_profile['members']
+# No message_content: slash commands carry their own arguments, prefix
+# commands still work when the bot is mentioned or in direct messages
+
+if cache_profile['member_cache'] == 'none':
+    member_cache_flags = discord.MemberCacheFlags.none()
+else:
+    member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+
+
+class F1OTree(app_commands.CommandTree):
+
+    async def interaction_check(self, interaction):
+        interaction.extras['started_at'] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction, error):
+        if isinstance(error, app_commands.CommandOnCooldown):
+            logger.info(f'Command /{interaction.command.name} on cooldown in channel {interaction.channel_id}')
+            await respond(interaction, {
+                'content': f'Bitte warte noch {error.retry_after:.0f}s.', 'ephemeral': True
+            })
+            return
+        record_app_command(interaction, interaction.command, failed=True)
+        logger.exception(f'Command failed: /{interaction.command and interaction.command.name}\n {error}')
+        await respond(interaction, {'content': 'Der Befehl ist fehlgeschlagen.', 'ephemeral': True})
+
+
+class F1OBot(commands.AutoShardedBot if AUTO_SHARD else commands.Bot):
+
+    async def setup_hook(self):
+        # Runs before the gateway connects, so background work does not wait
+        # for on_ready, which may fire late or several times on reconnects
+        restore_warm_state(await warm_state.load())
+        for liga in league_registry.names():
+            get_league_embed(liga)
+        # Runs the HTTP client module, importing httpx, in a worker thread
+        await asyncio.to_thread(getattr, client, 'pool')
+        await client.pool.Warm()
+        await sync_app_commands()
+        loop_monitor.start()
+        if METRICS_PORT:
+            await metrics_server.start()
+        if STAGE == 'LIVE' and not renew_leader_lease.is_running():
+            renew_leader_lease.start()
+        if not check_f1_updates.is_running():
+            check_f1_updates.start()
+        if not deliver_notifications.is_running():
+            deliver_notifications.start()
+        if not probe_f1o_website.is_running():
+            probe_f1o_website.start()
+        if not refresh_standings.is_running():
+            refresh_standings.start()
+        if not ingest_results.is_running():
+            ingest_results.start()
+        if not save_warm_state.is_running():
+            save_warm_state.start()
+
+    async def close(self):
+        await warm_state.save(collect_warm_state())
+        # Whatever the checker found is saved before another process takes over
+        if renovate is not None:
+            await renovate.Close()
+        client.pool.Close()
+        await client.pool.AsyncClose()
+        await leader_lease.release()
+        await super().close()
+
+
+shard_options = {}
+if AUTO_SHARD:
+    if SHARD_COUNT:
+        shard_options['shard_count'] = SHARD_COUNT
+    if SHARD_IDS:
+        shard_options['shard_ids'] = SHARD_IDS
 
 # Prefix includes the config symbol and the 'f1' name with hard-coded space
-bot = commands.Bot(
-    command_prefix=f"{PREFIX}f1o ",
+COMMAND_PREFIX = f"{PREFIX}f1o "
+
+bot = F1OBot(
+    command_prefix=commands.when_mentioned_or(COMMAND_PREFIX),
     case_insensitive=True,
-    intents=intents
+    intents=intents,
+    tree_cls=F1OTree,
+    member_cache_flags=member_cache_flags,
+    chunk_guilds_at_startup=cache_profile['chunk_guilds_at_startup'],
+    max_messages=cache_profile['max_messages'],
+    **shard_options
 )
 
 
 @bot.event
 async def on_ready():
     logger.info('Bot ready...')
-    job = Activity(name=bot.command_prefix, type=ActivityType.watching)
+    job = Activity(name='/status', type=ActivityType.watching)
     await bot.change_presence(activity=job)
-    check_f1_updates.start()
+
+
+# Awaited inline right before the callback, unlike the on_command event,
+# which runs as a task and would miss work done before the first await
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+
+
+def record_command(ctx, failed=False):
+    started_at = getattr(ctx, 'started_at', None)
+    if ctx.command is not None and started_at is not None:
+        command_stats.record(
+            ctx.command.qualified_name, time.perf_counter() - started_at, failed
+        )
 
 
 @bot.event
 async def on_command_completion(ctx):
+    record_command(ctx)
     logger.info(f'Command {ctx.prefix}{ctx.command} command complete')
 
 
+def record_app_command(interaction, command, failed=False):
+    started_at = interaction.extras.get('started_at')
+    if command is not None and started_at is not None:
+        command_stats.record(
+            f'/{command.qualified_name}', time.perf_counter() - started_at, failed
+        )
+
+
+@bot.event
+async def on_app_command_completion(interaction, command):
+    record_app_command(interaction, command)
+    logger.info(f'Command /{command.qualified_name} command complete')
+
+
 @bot.event
 async def on_command_error(ctx, err):
+    if isinstance(err, commands.CommandOnCooldown):
+        logger.info(f'Command {ctx.prefix}{ctx.command} on cooldown in channel {ctx.channel.id}')
+        return
+    record_command(ctx, failed=True)
     logger.exception(f'Command failed: {ctx.prefix}{ctx.command}\n {err}')
 
 
+def runs_update_checker():
+    return STAGE == 'LIVE' and leader_lease.holds()
+
+
+def get_renovate():
+    """Return the update checker, importing and creating it on first use.
+
+    Only the process that runs the checker should create it, others read
+    the history through patch_timeline.
+    """
+    global renovate
+    if renovate is None:
+        from updatechecker.renovate import Renovate
+        renovate = Renovate()
+        renovate.RestoreState(restored_state.get('renovate'))
+    return renovate
+
+
+def collect_warm_state():
+    state = {
+        'website': website_probe.export(),
+        'standings': standings_cache.export(),
+        'app_commands': restored_state.get('app_commands'),
+    }
+    if renovate is not None:
+        state['renovate'] = renovate.ExportState()
+    elif 'renovate' in restored_state:
+        # Keep the schedule of a previous leader for the next one
+        state['renovate'] = restored_state['renovate']
+    return state
+
+
+def restore_warm_state(state):
+    restored_state.update(state)
+    website_probe.restore(state.get('website'))
+    standings_cache.restore(state.get('standings'))
+    if state:
+        logger.info(f"Restored warm state saved {int(time.time() - state['saved_at'])}s ago")
+
+
+def collect_metrics(metrics):
+    """Export the bot's counters, called for every scrape of the metrics endpoint."""
+    metrics.metric(
+        'f1o_commands_total', 'counter', 'Commands invoked, by command.',
+        (({'command': name}, histogram.count)
+         for name, histogram in command_stats.histograms.items())
+    )
+    metrics.metric(
+        'f1o_command_errors_total', 'counter', 'Commands that failed, by command.',
+        (({'command': name}, count) for name, count in command_stats.errors.items())
+    )
+    metrics.histogram(
+        'f1o_command_duration_seconds', 'Command latency.',
+        (({'command': name}, histogram.counts, histogram.count, histogram.sum)
+         for name, histogram in command_stats.histograms.items()),
+        LatencyHistogram.BUCKETS, scale=0.001
+    )
+    metrics.metric(
+        'f1o_gateway_latency_seconds', 'gauge', 'Discord gateway heartbeat latency.',
+        [({}, bot.latency if math.isfinite(bot.latency) else None)]
+    )
+    lag_p50, lag_p99 = loop_monitor.percentiles(50, 99)
+    metrics.metric(
+        'f1o_event_loop_lag_seconds', 'gauge', 'Event loop lag percentiles.',
+        [({'quantile': '0.5'}, None if lag_p50 is None else lag_p50 / 1000),
+         ({'quantile': '0.99'}, None if lag_p99 is None else lag_p99 / 1000)]
+    )
+    metrics.metric(
+        'f1o_event_loop_stalls_total', 'counter', 'Event loop stalls above the threshold.',
+        [({}, loop_monitor.stalls)]
+    )
+    metrics.metric(
+        'f1o_process_resident_memory_bytes', 'gauge', 'Resident memory of the bot process.',
+        [({}, resident_memory())]
+    )
+    metrics.metric(
+        'f1o_cache_entries', 'gauge', 'Objects in the Discord cache, by kind.',
+        (({'kind': kind}, count) for kind, count in cache_sizes().items())
+    )
+    metrics.metric(
+        'f1o_renovate_leader', 'gauge', 'Whether this process runs the update checker.',
+        [({}, int(leader_lease.holds()))]
+    )
+    http = client.pool.Stats()
+    metrics.metric(
+        'f1o_http_requests_total', 'counter', 'HTTP requests sent by the update checker, by host.',
+        (({'host': host}, stats['requests']) for host, stats in http['hosts'].items())
+    )
+    metrics.metric(
+        'f1o_http_connections_total', 'counter', 'HTTP connections opened, by host.',
+        (({'host': host}, stats['connections']) for host, stats in http['hosts'].items())
+    )
+    metrics.metric(
+        'f1o_http_pool_open_connections', 'gauge', 'Connections currently held by the HTTP pool.',
+        [({}, http['open'])]
+    )
+    # The update checker only exists in the process that runs it
+    if renovate is None:
+        return
+    from updatechecker import utils as renovate_utils
+    from updatechecker.webhook import dispatcher
+    metrics.metric(
+        'f1o_renovate_cycles_total', 'counter', 'Completed update cycles.',
+        [({}, renovate.cycles)]
+    )
+    metrics.metric(
+        'f1o_renovate_cycle_seconds_total', 'counter', 'Time spent in update cycles.',
+        [({}, renovate.cycleSeconds)]
+    )
+    metrics.metric(
+        'f1o_renovate_last_cycle_seconds', 'gauge', 'Duration of the last update cycle.',
+        [({}, renovate.lastCycleSeconds)]
+    )
+    metrics.metric(
+        'f1o_renovate_title_checks_total', 'counter', 'Title checks, by title and outcome.',
+        (({'platform': platform, 'title': title, 'outcome': outcome}, count)
+         for (platform, title, outcome), count in renovate.outcomes.items())
+    )
+    metrics.metric(
+        'f1o_outbox_pending', 'gauge', 'Update notifications waiting for delivery.',
+        [({}, None if renovate.store is None else renovate.store.OutboxDepth())]
+    )
+    metrics.metric(
+        'f1o_outbox_deliveries_total', 'counter', 'Outbox delivery attempts, by result.',
+        [({'result': 'delivered'}, renovate.delivered),
+         ({'result': 'failed'}, renovate.deliveryFailures)]
+    )
+    metrics.metric(
+        'f1o_http_retries_total', 'counter', 'Retried HTTP requests, by kind.',
+        [({'kind': 'lookup'}, renovate_utils.retries['GET']),
+         ({'kind': 'webhook'}, dispatcher.retries)]
+    )
+    metrics.metric(
+        'f1o_webhook_queue_depth', 'gauge', 'Embeds waiting for webhook delivery.',
+        [({}, dispatcher.Depth())]
+    )
+    metrics.metric(
+        'f1o_webhook_embeds_total', 'counter', 'Webhook embeds, by result.',
+        [({'result': 'sent'}, dispatcher.sent), ({'result': 'failed'}, dispatcher.failed)]
+    )
+    metrics.metric(
+        'f1o_webhook_rate_limited_total', 'counter', 'Webhook requests answered with 429.',
+        [({}, dispatcher.rateLimited)]
+    )
+
+
+metrics_server = MetricsServer(METRICS_HOST, METRICS_PORT, collect_metrics)
+
+
 # Main commands group
 
 # set global time bot started
@@ -66,11 +387,34 @@ def get_uptime():
     return (int(days), int(hours), int(mins), int(secs))
 
 
+def cache_sizes():
+    """Count the objects held in the Discord cache."""
+    return {
+        'guilds': len(bot.guilds),
+        'members': sum(len(guild.members) for guild in bot.guilds),
+        'users': len(bot.users),
+        'messages': len(bot.cached_messages),
+    }
+
+
+# Application info rarely changes, avoid a Discord round trip per status call
+app_info_cache = TTLCached(bot.application_info, APP_INFO_TTL)
+
+# Concurrent status requests share a single embed
+status_requests = Coalescer()
+
+
 @bot.command()
+@commands.cooldown(1, STATUS_COOLDOWN, commands.BucketType.channel)
 async def status(ctx, *args):
     """Get the bot status including uptime, latency and owner."""
+    embed = await status_requests.run('status', build_status_embed)
+    await ctx.send(embed=embed)
+
+
+async def build_status_embed():
     uptime = get_uptime()
-    app_info = await bot.application_info()
+    app_info = await app_info_cache.get()
     latency = int(bot.latency * 1000)
 
     if bot.is_closed():
@@ -78,12 +422,38 @@ async def status(ctx, *args):
     else:
         ws_conn = "```yaml\nOpen\n```"
 
-    f1o_website_status = await check_f1owebite_status()
+    f1o_website_status = await check_f1owebite_status(website_probe)
     if f1o_website_status == 200:
         f1o_status = "```yaml\nOnline\n```"
     else:
         f1o_status = "```glsl\nOffline\n```"
 
+    p50, p95 = website_probe.latency_percentiles(50, 95)
+    if p50 is None:
+        response_times = 'n/a'
+    else:
+        response_times = f'p50 {int(p50)} ms, p95 {int(p95)} ms'
+    age = website_probe.age()
+    checked = 'never' if age is None else f'{int(age)}s ago'
+
+    lag_p50, lag_p99 = loop_monitor.percentiles(50, 99)
+    if lag_p50 is None:
+        loop_lag = 'n/a'
+    else:
+        loop_lag = f'p50 {lag_p50:.1f} ms, p99 {lag_p99:.1f} ms'
+    slowest = '\n'.join(
+        f'{name}: p95 {int(p95)} ms ({count}x)'
+        for name, p95, count in command_stats.slowest(3)
+    ) or 'n/a'
+
+    rss = resident_memory()
+    sizes = cache_sizes()
+    memory = (
+        f"RSS {'n/a' if rss is None else f'{rss / 2 ** 20:.0f} MB'} ({CACHE_PROFILE})\n"
+        f"{sizes['guilds']} guilds, {sizes['members']} members, "
+        f"{sizes['users']} users, {sizes['messages']} messages"
+    )
+
     embed = Embed(
         title=f"Status - {app_info.name}",
         description=f"{app_info.description}",
@@ -99,250 +469,332 @@ async def status(ctx, *args):
         inline=True
     )
     embed.add_field(name='F1O Website', value=f'{f1o_status}', inline=True)
-    await ctx.send(embed=embed)
+    embed.add_field(
+        name='F1O Response Time',
+        value=f'{response_times}\nchecked {checked}',
+        inline=True
+    )
+    embed.add_field(name='Loop Lag', value=loop_lag, inline=True)
+    embed.add_field(name='Slowest Commands', value=slowest, inline=True)
+    embed.add_field(name='Memory', value=memory, inline=True)
+    return embed
 
 
 @bot.command()
 async def liga(ctx, *args):
     """Get a overview of usefull links based on the league channel (works only i a league-channel)"""
-    channelID = ctx.channel.id
-    if STAGE == 'DEV':
-        if channelID == 927681602081939469:
-            await send_league_summary(ctx, 'SIM1')
-            await send_league_summary(ctx, 'SIM2')
-            await send_league_summary(ctx, 'FH1-100')
-            await send_league_summary(ctx, 'FH2-100')
-            await send_league_summary(ctx, 'FH3-100')
-            await send_league_summary(ctx, 'FH4-100')
-            await send_league_summary(ctx, 'FH5-100')
-            await send_league_summary(ctx, 'FH6-100')
-            await send_league_summary(ctx, 'FH1-50')
-            await send_league_summary(ctx, 'FH2-50')
-            await send_league_summary(ctx, 'FH3-50')
-            await send_league_summary(ctx, 'FH4-50')
-            await send_league_summary(ctx, 'FH5-50')
-            await send_league_summary(ctx, 'F2-FH1')
-            await send_league_summary(ctx, 'F2-FH2')
+    league_registry.refresh()
+    await send_league_summaries(ctx, league_registry.for_channel(ctx.channel.id))
+
+
+@bot.command()
+@commands.is_owner()
+async def reload(ctx, *args):
+    """Reload the league data and the update checker configuration and history."""
+    league_registry.refresh()
+    if not runs_update_checker():
+        await ctx.send('League data reloaded, the update checker runs in another process.')
+    elif await get_renovate().Reload():
+        await ctx.send('League data and update checker reloaded.')
     else:
-        # SIM1
-        if channelID == 802273878507388959:
-            await send_league_summary(ctx, 'SIM1')
-        # SIM2
-        elif channelID == 940536923812941874:
-            await send_league_summary(ctx, 'SIM2')
-        # FH1-100
-        elif channelID == 747733037701267499:
-            await send_league_summary(ctx, 'FH1-100')
-        # FH2-100
-        elif channelID == 747733103090466836:
-            await send_league_summary(ctx, 'FH2-100')
-        # FH3-100
-        elif channelID == 747733168387260450:
-            await send_league_summary(ctx, 'FH3-100')
-        # FH4-100
-        elif channelID == 747733240378294292:
-            await send_league_summary(ctx, 'FH4-100')
-        # FH5-100
-        elif channelID == 823677049595363348:
-            await send_league_summary(ctx, 'FH5-100')
-        # FH6-100
-        elif channelID == 871494748983132210:
-            await send_league_summary(ctx, 'FH6-100')
-        # FH1-50
-        elif channelID == 940520492782219284:
-            await send_league_summary(ctx, 'FH1-50')
-        # FH2-50
-        elif channelID == 940520634499350558:
-            await send_league_summary(ctx, 'FH2-50')
-        # FH3-50
-        elif channelID == 940520734357331969:
-            await send_league_summary(ctx, 'FH3-50')
-        # FH4-50
-        elif channelID == 940520917698744340:
-            await send_league_summary(ctx, 'FH4-50')
-        # FH5-50
-        elif channelID == 940521022443106354:
-            await send_league_summary(ctx, 'FH5-50')
-        # F2-FH1
-        elif channelID == 871495307106582629:
-            await send_league_summary(ctx, 'F2-FH1')
-        # F2-FH2
-        elif channelID == 871495388836798485:
-            await send_league_summary(ctx, 'F2-FH2')
-        #bot-test
-        elif channelID == 1015237148577894461:
-            await send_league_summary(ctx, 'SIM1')
-            await send_league_summary(ctx, 'SIM2')
-            await send_league_summary(ctx, 'FH1-100')
-            await send_league_summary(ctx, 'FH2-100')
-            await send_league_summary(ctx, 'FH3-100')
-            await send_league_summary(ctx, 'FH4-100')
-            await send_league_summary(ctx, 'FH5-100')
-            await send_league_summary(ctx, 'FH6-100')
-            await send_league_summary(ctx, 'FH1-50')
-            await send_league_summary(ctx, 'FH2-50')
-            await send_league_summary(ctx, 'FH3-50')
-            await send_league_summary(ctx, 'FH4-50')
-            await send_league_summary(ctx, 'FH5-50')
-            await send_league_summary(ctx, 'F2-FH1')
-            await send_league_summary(ctx, 'F2-FH2')
-
-
-async def send_league_summary(ctx, liga):
-    leagues: Dict[str, Any] = {
-        "SIM1": {
-            'leagueID': 203,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/28-ps-f1-liga-100/?bundle=SIM%20(1-2)&leagueID=203',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?bundle=SIM%20(1-2)&leagueID=203',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/28-ps-f1-liga-100/?bundle=SIM%20(1-2)&leagueID=203',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?stats=1&leagueID=203',
-            'ligaleiter': 'F1O_sf1994',
-        },
-        "SIM2": {
-            'leagueID': 204,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/28-ps-f1-liga-100/?bundle=SIM%20(1-2)&leagueID=204',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?bundle=SIM%20(1-2)&leagueID=204',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/28-ps-f1-liga-100/?bundle=SIM%20(1-2)&leagueID=204',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?stats=1&leagueID=204',
-            'ligaleiter': 'Michael_31097',
-        },
-        "FH1-100": {
-            'leagueID': 205,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/28-ps-f1-liga-100/?bundle=FH%20(1-2)&leagueID=205',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?bundle=FH%20(1-2)&leagueID=205',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/28-ps-f1-liga-100/?bundle=FH%20(1-2)&leagueID=205',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?stats=1&leagueID=205',
-            'ligaleiter': 'Blanki182',
-        },
-        "FH2-100": {
-            'leagueID': 206,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/28-ps-f1-liga-100/?bundle=FH%20(1-2)&leagueID=206',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?bundle=FH%20(1-2)&leagueID=206',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/28-ps-f1-liga-100/?bundle=FH%20(1-2)&leagueID=206',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?stats=1&leagueID=206',
-            'ligaleiter': 'F1O_sf1994',
-        },
-        "FH3-100": {
-            'leagueID': 207,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/28-ps-f1-liga-100/?bundle=FH%20(3-4)&leagueID=207',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?bundle=FH%20(3-4)&leagueID=207',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/28-ps-f1-liga-100/?bundle=FH%20(3-4)&leagueID=207',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?stats=1&leagueID=207',
-            'ligaleiter': 'Tobi17662',
-        },
-        "FH4-100": {
-            'leagueID': 208,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/28-ps-f1-liga-100/?bundle=FH%20(3-4)&leagueID=208',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?bundle=FH%20(3-4)&leagueID=208',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/28-ps-f1-liga-100/?bundle=FH%20(3-4)&leagueID=208',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?stats=1&leagueID=208',
-            'ligaleiter': 'Why2Jay84',
-        },
-        "FH5-100": {
-            'leagueID': 209,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/28-ps-f1-liga-100/?bundle=FH%20(5-6)&leagueID=209',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?bundle=FH%20(5-6)&leagueID=209',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/28-ps-f1-liga-100/?bundle=FH%20(5-6)&leagueID=209',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?stats=1&leagueID=209',
-            'ligaleiter': 'zCrxw02_F1O',
-        },
-        "FH6-100": {
-            'leagueID': 210,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/28-ps-f1-liga-100/?bundle=FH%20(5-6)&leagueID=210',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?bundle=FH%20(5-6)&leagueID=210',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/28-ps-f1-liga-100/?bundle=FH%20(5-6)&leagueID=210',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/28-ps-f1-liga-100/?stats=1&leagueID=210',
-            'ligaleiter': 'Michael_31097',
-        },
-        "FH1-50": {
-            'leagueID': 214,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement50/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/29-ps-f1-liga-50/?bundle=FH1&leagueID=214',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/29-ps-f1-liga-50/?bundle=FH1&leagueID=214',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/29-ps-f1-liga-50/?bundle=FH1&leagueID=214',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/29-ps-f1-liga-50/?stats=1&leagueID=203',
-            'ligaleiter': 'Sexy_Monti',
-        },
-        "FH2-50": {
-            'leagueID': 215,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement50/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/29-ps-f1-liga-50/?bundle=FH%20(2-3)&leagueID=215',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/29-ps-f1-liga-50/?bundle=FH%20(2-3)&leagueID=215',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/29-ps-f1-liga-50/?bundle=FH%20(2-3)&leagueID=215',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/29-ps-f1-liga-50/?stats=1&leagueID=215',
-            'ligaleiter': 'Daniel_1887',
-        },
-        "FH3-50": {
-            'leagueID': 216,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement50/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/29-ps-f1-liga-50/?bundle=FH%20(2-3)&leagueID=216',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/29-ps-f1-liga-50/?bundle=FH%20(2-3)&leagueID=216',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/29-ps-f1-liga-50/?bundle=FH%20(2-3)&leagueID=216',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/29-ps-f1-liga-50/?stats=1&leagueID=216',
-            'ligaleiter': 'zCrxw02_F1O',
-        },
-        "FH4-50": {
-            'leagueID': 217,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement50/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/29-ps-f1-liga-50/?bundle=FH%20(4-5)&leagueID=217',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/29-ps-f1-liga-50/?bundle=FH%20(4-5)&leagueID=217',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/29-ps-f1-liga-50/?bundle=FH%20(4-5)&leagueID=217',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/29-ps-f1-liga-50/?stats=1&leagueID=217',
-            'ligaleiter': 'Sexy_Monti',
-        },
-        "FH5-50": {
-            'leagueID': 218,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f1-reglement50/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/29-ps-f1-liga-50/?bundle=FH%20(4-5)&leagueID=218',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/29-ps-f1-liga-50/?bundle=FH%20(4-5)&leagueID=218',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/29-ps-f1-liga-50/?bundle=FH%20(4-5)&leagueID=218',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/29-ps-f1-liga-50/?stats=1&leagueID=218',
-            'ligaleiter': 'Why2Jay84',
-        },
-        "F2-FH1": {
-            'leagueID': 220,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f2-reglement/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/30-ps-f2-liga/?bundle=FH1&leagueID=220',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/30-ps-f2-liga/?bundle=FH1&leagueID=220',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/30-ps-f2-liga/?bundle=FH1&leagueID=220',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/30-ps-f2-liga/?stats=1&leagueID=220',
-            'ligaleiter': 'Blanki182',
-        },
-        "F2-FH2": {
-            'leagueID': 221,
-            'reglement_URL': 'https://www.f1-onlineliga.com/league/ps-f2-reglement/',
-            'SA_URL': 'https://www.f1-onlineliga.com/league/warnings/',
-            'cockpits_overview_URL': 'https://www.f1-onlineliga.com/league/cockpits-overview/30-ps-f2-liga/?bundle=FH2&leagueID=221',
-            'current_standing_URL': 'https://www.f1-onlineliga.com/league/tables/30-ps-f2-liga/?bundle=FH2&leagueID=221',
-            'result_overview_URL': 'https://www.f1-onlineliga.com/league/result-overview/30-ps-f2-liga/?bundle=FH2&leagueID=221',
-            'stats_URL': 'https://www.f1-onlineliga.com/league/tables/30-ps-f2-liga/?stats=1&leagueID=221',
-            'ligaleiter': 'Daniel_1887',
-        }
-    }
-    if leagues.get(liga):
-        currentLeague = leagues.get(liga)
+        await ctx.send('League data reloaded, update checker configuration could not be loaded.')
+
+
+@bot.command()
+async def updates(ctx, *args):
+    """Get the polling statistics of the titles watched for updates."""
+    if not runs_update_checker():
+        await ctx.send(embed=build_history_embed(await asyncio.to_thread(patch_timeline.Patches)))
+        return
+
+    stats = get_renovate().Stats()
+    embed = Embed(
+        title="Update-Checker",
+        description=f"{len(stats)} Titel werden beobachtet.",
+        colour=Colour.teal()
+    )
+    now = time.time()
+    for title, title_stats in list(stats.items())[:25]:
+        last_change = title_stats['lastChange']
+        embed.add_field(
+            name=title,
+            value=(
+                f"Intervall: {int(title_stats['interval'])}s "
+                f"(Ø {int(title_stats['averageInterval'] or title_stats['interval'])}s)\n"
+                f"Nächste Prüfung: in {max(int(title_stats['nextCheck'] - now), 0)}s\n"
+                f"Prüfungen: {title_stats['checks']}, Updates: {title_stats['changes']}\n"
+                f"Letztes Update: "
+                f"{'-' if last_change is None else f'vor {int((now - last_change) // 60)} min'}"
+            ),
+            inline=True
+        )
+    await ctx.send(embed=embed)
+
+
+def build_history_embed(timeline):
+    """Summarize the stored updates, for processes not running the checker."""
+    embed = Embed(
+        title="Update-Checker",
+        description="Der Update-Checker läuft in einem anderen Prozess.",
+        colour=Colour.teal()
+    )
+    if timeline is None:
+        return embed
+    now = time.time()
+    for platform, title_id in timeline.Titles()[:25]:
+        last = timeline.Latest(1, [title_id])
+        interval = timeline.AverageInterval(platform, title_id)
+        embed.add_field(
+            name=f'{platform}/{title_id}',
+            value=(
+                f"Version: {last[0].version if last else '-'}\n"
+                f"Letztes Update: "
+                f"{f'vor {int((now - last[0].observed) // 3600)} h' if last else '-'}\n"
+                f"Ø alle {'-' if interval is None else f'{interval / 86400:.1f}'} Tage"
+            ),
+            inline=True
+        )
+    return embed
+
+
+def channel_league(channel_id):
+    """Return the league of a channel, None if it shows none or several."""
+    channel_leagues = league_registry.for_channel(channel_id)
+    return channel_leagues[0] if len(channel_leagues) == 1 else None
+
+
+async def standings_message(liga):
+    """Return the message kwargs answering a standings request."""
+    liga = liga.upper()
+    try:
+        table, fetched_at = await standings_cache.get(liga)
+    except KeyError:
+        return {'content': f'Unbekannte Liga: {liga}'}
+    except Exception as e:
+        logger.warning(f'Could not load standings of {liga}: {e}')
+        return {'content': 'Die Tabelle konnte gerade nicht geladen werden.'}
+    return {'embed': build_standings_embed(liga, table, fetched_at)}
+
+
+@bot.command()
+async def tabelle(ctx, liga=None, *args):
+    """Get the current standings of a league (defaults to the league of the channel)"""
+    league_registry.refresh()
+    liga = liga or channel_league(ctx.channel.id)
+    if liga is None:
+        await ctx.send(f'Bitte gib eine Liga an, z.B. `{ctx.prefix}tabelle FH1-100`.')
+        return
+    await ctx.send(**await standings_message(liga))
+
+
+def resolve_ligas(channel_id, liga):
+    """Return the leagues a lookup covers: the given one, the channel's or all."""
+    league_registry.refresh()
+    if liga is not None:
+        return [liga.upper()]
+    return league_registry.for_channel(channel_id) or league_registry.names()
+
+
+def position_line(summary):
+    if summary['average_position'] is None:
+        return 'Ø Position: - (nie gewertet)'
+    line = (
+        f"Ø Position: {summary['average_position']:.1f} "
+        f"(± {summary['consistency']:.1f}), beste: {summary['best_position']}"
+    )
+    unclassified = summary['races'] - summary['classified']
+    if unclassified:
+        line += f", {unclassified}x nicht gewertet"
+    return line
+
+
+async def stats_message(driver, liga, channel_id):
+    """Return the message kwargs answering a driver statistics request."""
+    ligas = resolve_ligas(channel_id, liga)
+    if liga is not None and league_registry.get(ligas[0]) is None:
+        return {'content': f'Unbekannte Liga: {ligas[0]}'}
+
+    summaries = await results_engine.driver_leagues(driver, ligas)
+    if not summaries:
+        return {'content': f'Keine Ergebnisse für {driver} gefunden.'}
+
+    embed = Embed(
+        title=f"Statistiken - {summaries[0][1]['driver']}",
+        colour=Colour.red()
+    )
+    for name, summary in summaries[:25]:
+        embed.add_field(
+            name=name,
+            value=(
+                f"Rennen: {summary['races']}, Siege: {summary['wins']}, "
+                f"Podien: {summary['podiums']}\n"
+                f"{position_line(summary)}\n"
+                f"Punkte: {summary['points']:g} ({summary['points_per_race']:.1f} pro Rennen)\n"
+                f"Rang nach Punkten pro Rennen: {summary['rank']}/{summary['drivers']}"
+            ),
+            inline=True
+        )
+    return {'embed': embed}
+
+
+@bot.command()
+async def stats(ctx, driver, liga=None, *args):
+    """Get the race statistics of a driver, e.g. stats "Max Mustermann" FH3-100"""
+    await ctx.send(**await stats_message(driver, liga, ctx.channel.id))
+
+
+async def duell_message(driver, opponent, liga, channel_id):
+    """Return the message kwargs answering a head-to-head request."""
+    ligas = resolve_ligas(channel_id, liga)
+    if liga is not None and league_registry.get(ligas[0]) is None:
+        return {'content': f'Unbekannte Liga: {ligas[0]}'}
+
+    duel = await results_engine.head_to_head(driver, opponent, ligas)
+    if duel is None:
+        return {'content': f'Keine gemeinsamen Rennen von {driver} und {opponent} gefunden.'}
+
+    (name_a, name_b), totals = duel
+    gap = totals['average_gap']
+    embed = Embed(
+        title=f"Duell - {name_a} vs. {name_b}",
+        description=(
+            f"Gemeinsame Rennen: {totals['races']}\n"
+            f"Vorne: {name_a} {totals['ahead_a']}x, {name_b} {totals['ahead_b']}x\n"
+            f"Ø Abstand: {abs(gap):.1f} Plätze zugunsten von {name_a if gap >= 0 else name_b}"
+        ),
+        colour=Colour.red()
+    )
+    return {'embed': embed}
+
+
+@bot.command()
+async def duell(ctx, driver, opponent, liga=None, *args):
+    """Compare two drivers in the races they both drove, e.g. duell "A" "B" FH3-100"""
+    await ctx.send(**await duell_message(driver, opponent, liga, ctx.channel.id))
+
+
+# Transitions shown by the patches command
+MAX_PATCHES = 25
+
+DATE_ARGUMENT = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def parse_date(text):
+    return datetime.strptime(text, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
+
+
+def patches_message(timeline, version=None, start=None, end=None, count=10, title_ids=None):
+    """Return the message kwargs answering a patch timeline query.
+
+    timeline is the refreshed timeline, see patch_timeline. start and end
+    are dates as YYYY-MM-DD, end is inclusive.
+    """
+    if timeline is None:
+        return {'content': 'Der Update-Checker hat noch keine Patches gespeichert.'}
+
+    if version is not None:
+        entries = [
+            patch for patch in timeline.Find(version)
+            if title_ids is None or patch.titleId in title_ids
+        ][:MAX_PATCHES]
+        title = f'Patches - Version {version}'
+    elif start is not None:
+        try:
+            since = parse_date(start)
+            until = parse_date(end) + 86400 if end is not None else time.time()
+        except ValueError:
+            return {'content': 'Bitte gib Daten im Format JJJJ-MM-TT an.'}
+        entries = timeline.Range(since, until, title_ids)[-MAX_PATCHES:]
+        title = f"Patches - {start} bis {end or 'heute'}"
+    else:
+        entries = timeline.Latest(min(count, MAX_PATCHES), title_ids)
+        title = 'Patches - Neueste'
+
+    lines = [
+        f"{datetime.fromtimestamp(patch.observed, tz=timezone.utc):%Y-%m-%d %H:%M} "
+        f"{patch.platform}/{patch.titleId} "
+        f"{'neu' if patch.previous is None else patch.previous} -> {patch.version}"
+        for patch in entries
+    ]
+    embed = Embed(
+        title=title,
+        description='```\n' + '\n'.join(lines) + '\n```' if lines else 'Keine Patches gefunden.',
+        colour=Colour.teal()
+    )
+    intervals = [
+        f'{title_id}: alle {interval / 86400:.1f} Tage'
+        for platform, title_id in timeline.Titles()
+        if title_ids is None or title_id in title_ids
+        for interval in [timeline.AverageInterval(platform, title_id)]
+        if interval is not None
+    ]
+    if intervals:
+        embed.set_footer(text='Ø ' + ', '.join(intervals[:5]))
+    return {'embed': embed}
+
+
+@bot.command()
+async def patches(ctx, *args):
+    """Get the observed F1 patches, e.g. patches, patches 10, patches 01.08, patches 2022-07-01 2022-12-31 or patches CUSA29431"""
+    # Refreshing reads SQLite, off the event loop
+    timeline = await asyncio.to_thread(patch_timeline.Patches)
+    known = set() if timeline is None else {title_id for _, title_id in timeline.Titles()}
+    title_ids = [arg for arg in args if arg in known] or None
+    dates = [arg for arg in args if DATE_ARGUMENT.match(arg)]
+    counts = [int(arg) for arg in args if arg.isdigit() and arg not in known]
+    versions = [
+        arg for arg in args
+        if arg not in known and not DATE_ARGUMENT.match(arg) and not arg.isdigit()
+    ]
+    await ctx.send(**patches_message(
+        timeline,
+        version=versions[0] if versions else None,
+        start=dates[0] if dates else None,
+        end=dates[1] if len(dates) > 1 else None,
+        count=counts[0] if counts else 10,
+        title_ids=title_ids,
+    ))
+
+
+# Rows shown in a standings embed, keeps the embed below its size limit
+MAX_STANDINGS_ROWS = 40
+
+
+def build_standings_embed(liga, table, fetched_at):
+    lines = [f"{'Pos':>3} {'Fahrer':<18} {'Team':<14} {'Pkt':>4}"]
+    for row in table[:MAX_STANDINGS_ROWS]:
+        lines.append(
+            f'{row.position[:3]:>3} {row.driver[:18]:<18} {row.team[:14]:<14} {row.points[:4]:>4}'
+        )
+    embed = Embed(
+        title=f"Tabelle - {liga}",
+        description='```\n' + '\n'.join(lines) + '\n```' if table else 'Keine Einträge gefunden.',
+        url=league_registry.get(liga)['current_standing_URL'],
+        colour=Colour.red()
+    )
+    embed.set_footer(text=f'Stand: vor {int((time.time() - fetched_at) // 60)} min')
+    return embed
+
+
+# Discord limits a single message to 10 embeds and 6000 characters
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+# Rendered league summaries, each embed is only built once per registry version
+league_embeds = {}
+league_embeds_generation = 0
+
+
+def get_league_embed(liga):
+    """Return the cached summary embed of a league, or None for unknown leagues."""
+    global league_embeds_generation
+    if league_embeds_generation != league_registry.generation:
+        league_embeds.clear()
+        league_embeds_generation = league_registry.generation
+
+    embed = league_embeds.get(liga)
+    if embed is None and league_registry.get(liga):
+        currentLeague = league_registry.get(liga)
         embed = Embed(
             title=f"Übersicht - {liga}",
             description=f"Hier findest du einige nützliche Links und Informationen für deine Liga.",
@@ -355,16 +807,231 @@ async def send_league_summary(ctx, liga):
         embed.add_field(name='Aktueller Tabellenstand', value=currentLeague['current_standing_URL'], inline=False)
         embed.add_field(name='Ergebnisse der Rennen', value=currentLeague['result_overview_URL'], inline=False)
         embed.add_field(name='Statistiken', value=currentLeague['stats_URL'], inline=False)
+        league_embeds[liga] = embed
+    return embed
+
+
+def chunk_embeds(embeds):
+    """Split embeds into groups that each fit into a single message."""
+    chunks = []
+    current = []
+    size = 0
+    for embed in embeds:
+        if current and (len(current) == MAX_EMBEDS_PER_MESSAGE
+                        or size + len(embed) > MAX_EMBED_CHARS_PER_MESSAGE):
+            chunks.append(current)
+            current = []
+            size = 0
+        current.append(embed)
+        size += len(embed)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def send_league_summaries(ctx, ligas):
+    """Send the summaries of several leagues in as few messages as possible."""
+    embeds = [embed for embed in map(get_league_embed, ligas) if embed is not None]
+    for chunk in chunk_embeds(embeds):
+        await ctx.send(embeds=chunk)
+
+
+# Slash commands group
+
+async def respond(interaction, message):
+    """Answer an interaction, as a followup if the response was deferred."""
+    if interaction.response.is_done():
+        await interaction.followup.send(**message)
+    else:
+        await interaction.response.send_message(**message)
+
+
+async def sync_app_commands():
+    """Register the slash commands with Discord, only when they changed."""
+    signature = hashlib.sha256(json.dumps(
+        [command.to_dict(bot.tree) for command in bot.tree.get_commands()], sort_keys=True
+    ).encode()).hexdigest()
+    if restored_state.get('app_commands') == signature:
+        return
+    try:
+        await bot.tree.sync()
+    except discord.HTTPException as e:
+        logger.warning(f'Could not sync slash commands: {e}')
+        return
+    restored_state['app_commands'] = signature
+    logger.info('Synced slash commands')
+
+
+# Autocomplete is answered from memory, Discord gives it 3 seconds
+AUTOCOMPLETE_WAIT = 2
+
+
+async def league_autocomplete(interaction, current):
+    current = current.upper()
+    return [
+        app_commands.Choice(name=liga, value=liga)
+        for liga in league_registry.names() if liga.startswith(current)
+    ][:25]
+
+
+async def driver_autocomplete(interaction, current):
+    # The first request loads all stores, later ones answer from the index
+    loading = results_engine.preload()
+    if not loading.done():
+        await asyncio.wait({loading}, timeout=AUTOCOMPLETE_WAIT)
+    return [
+        app_commands.Choice(name=name, value=name)
+        for name in results_engine.complete_driver(current)
+    ]
+
+
+async def title_autocomplete(interaction, current):
+    if not patch_timeline.timeline.series:
+        await asyncio.to_thread(patch_timeline.Patches)
+    current = current.upper()
+    return [
+        app_commands.Choice(name=f'{platform}/{title_id}', value=title_id)
+        for platform, title_id in patch_timeline.timeline.Titles()
+        if title_id.upper().startswith(current)
+    ][:25]
+
+
+@bot.tree.command(name='status', description='Status des Bots und der F1O-Website')
+@app_commands.checks.cooldown(1, STATUS_COOLDOWN, key=lambda interaction: interaction.channel_id)
+async def status_slash(interaction):
+    await interaction.response.defer(thinking=True)
+    embed = await status_requests.run('status', build_status_embed)
+    await interaction.followup.send(embed=embed)
+
 
-        await ctx.send(embed=embed)
-    pass
+@bot.tree.command(name='liga', description='Nützliche Links einer Liga')
+@app_commands.describe(liga='Standard: die Liga dieses Kanals')
+@app_commands.autocomplete(liga=league_autocomplete)
+async def liga_slash(interaction, liga: str = None):
+    league_registry.refresh()
+    ligas = [liga.upper()] if liga else league_registry.for_channel(interaction.channel_id)
+    embeds = [embed for embed in map(get_league_embed, ligas) if embed is not None]
+    if not embeds:
+        await interaction.response.send_message(
+            'Unbekannte Liga.' if liga else 'Dieser Kanal gehört zu keiner Liga.', ephemeral=True
+        )
+        return
+    chunks = chunk_embeds(embeds)
+    await interaction.response.send_message(embeds=chunks[0])
+    for chunk in chunks[1:]:
+        await interaction.followup.send(embeds=chunk)
+
+
+@bot.tree.command(name='tabelle', description='Aktuelle Tabelle einer Liga')
+@app_commands.describe(liga='Standard: die Liga dieses Kanals')
+@app_commands.autocomplete(liga=league_autocomplete)
+async def tabelle_slash(interaction, liga: str = None):
+    league_registry.refresh()
+    liga = (liga or channel_league(interaction.channel_id) or '').upper()
+    if not liga:
+        await interaction.response.send_message('Bitte gib eine Liga an.', ephemeral=True)
+        return
+    # Only the first request of a league waits for the website
+    if liga not in standings_cache.tables:
+        await interaction.response.defer(thinking=True)
+    await respond(interaction, await standings_message(liga))
+
+
+@bot.tree.command(name='stats', description='Statistiken eines Fahrers')
+@app_commands.describe(fahrer='Name des Fahrers', liga='Standard: die Ligen dieses Kanals oder alle')
+@app_commands.autocomplete(fahrer=driver_autocomplete, liga=league_autocomplete)
+async def stats_slash(interaction, fahrer: str, liga: str = None):
+    await interaction.response.defer(thinking=True)
+    await respond(interaction, await stats_message(fahrer, liga, interaction.channel_id))
+
+
+@bot.tree.command(name='duell', description='Zwei Fahrer in ihren gemeinsamen Rennen')
+@app_commands.describe(liga='Standard: die Ligen dieses Kanals oder alle')
+@app_commands.autocomplete(
+    fahrer=driver_autocomplete, gegner=driver_autocomplete, liga=league_autocomplete
+)
+async def duell_slash(interaction, fahrer: str, gegner: str, liga: str = None):
+    await interaction.response.defer(thinking=True)
+    await respond(interaction, await duell_message(fahrer, gegner, liga, interaction.channel_id))
+
+
+@bot.tree.command(name='patches', description='Beobachtete F1-Patches')
+@app_commands.describe(
+    version='Wann erschien diese Version, z.B. 01.08',
+    von='Patches ab diesem Tag, JJJJ-MM-TT',
+    bis='Patches bis zu diesem Tag, JJJJ-MM-TT',
+    anzahl='Anzahl der neuesten Patches',
+    titel='Nur diesen Titel zeigen',
+)
+@app_commands.autocomplete(titel=title_autocomplete)
+async def patches_slash(
+    interaction, version: str = None, von: str = None, bis: str = None,
+    anzahl: app_commands.Range[int, 1, MAX_PATCHES] = 10, titel: str = None
+):
+    await interaction.response.defer(thinking=True)
+    timeline = await asyncio.to_thread(patch_timeline.Patches)
+    await respond(interaction, patches_message(
+        timeline, version=version, start=von, end=bis, count=anzahl,
+        title_ids=[titel] if titel else None,
+    ))
 
 
 # Loop commands group
-@tasks.loop(seconds=300)
+@tasks.loop(seconds=WEBSITE_PROBE_INTERVAL)
+async def probe_f1o_website():
+    await website_probe.probe()
+
+
+@tasks.loop(seconds=STANDINGS_REFRESH_INTERVAL)
+async def refresh_standings():
+    await standings_cache.refresh_expired()
+
+
+@tasks.loop(seconds=RESULTS_REFRESH_INTERVAL)
+async def ingest_results():
+    await results_engine.ingest_all()
+
+
+@ingest_results.before_loop
+async def before_ingest_results():
+    # Loads NumPy and every store, not needed to start answering commands
+    await bot.wait_until_ready()
+
+
+@tasks.loop(seconds=OUTBOX_TICK)
+async def deliver_notifications():
+    # Runs beside check_f1_updates, a slow webhook never delays detection
+    if runs_update_checker():
+        await get_renovate().Deliver()
+
+
+@tasks.loop(seconds=WARM_STATE_INTERVAL)
+async def save_warm_state():
+    await warm_state.save(collect_warm_state())
+
+
+@save_warm_state.before_loop
+async def before_save_warm_state():
+    # The first iteration would only save what was just restored
+    await asyncio.sleep(WARM_STATE_INTERVAL)
+
+
+@tasks.loop(seconds=LEADER_RENEW_INTERVAL)
+async def renew_leader_lease():
+    was_leader = leader_lease.is_leader
+    if await leader_lease.renew() and not was_leader and renovate is not None:
+        # Another process ran the checker since this one last did
+        try:
+            await renovate.Resync()
+        except Exception as e:
+            # An error here would stop the loop and with it the renewals
+            logger.exception(f'Could not resync the update checker\n {e}')
+
+
+@tasks.loop(seconds=UPDATE_CHECK_TICK)
 async def check_f1_updates():
-    if STAGE == 'LIVE':
-        logger.warning('Loop F1 Updates')
-        Renovate.Initialize(Renovate)
+    if runs_update_checker():
+        logger.debug('Loop F1 Updates')
+        await get_renovate().Initialize()
     else:
         pass
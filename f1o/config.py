@@ -19,14 +19,105 @@ OUT_DIR = os.path.join(BASE_DIR, 'output')
 # Where to store static data files
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 
+# Leagues and the channels they are shown in, reloaded when the file changes
+LEAGUES_FILE = os.path.join(DATA_DIR, 'leagues.json')
+
 # DEBUG
 # WARNING
 # ERROR
 LOG_LEVEL = "DEBUG"
 
+# 'json' writes one JSON object per line with fields like cycle, platform
+# and titleId, 'text' writes plain lines
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+
+# Seconds during which repeated steady-state messages, like a title that is
+# still not updated, are only logged once; cycle summaries carry the counts
+LOG_SAMPLE_INTERVAL = 3600
+
 # Change the prefix used to call the bot
 PREFIX = '!'
 
+# Website checked in the background for the status command
+F1O_WEBSITE_URL = 'https://www.f1-onlineliga.com/'
+
+# Seconds between website checks and hard timeout of a single check
+WEBSITE_PROBE_INTERVAL = 60
+WEBSITE_PROBE_TIMEOUT = 5.0
+
+# Seconds the bot's application info is cached for the status command, and
+# cooldown in seconds of the status command per channel
+APP_INFO_TTL = 3600
+STATUS_COOLDOWN = 10
+
+# Seconds a league standings table is served before it is refreshed in the
+# background, and seconds between checks for expired tables
+STANDINGS_TTL = 900
+STANDINGS_REFRESH_INTERVAL = 60
+
+# Columnar race result stores, one file per league, and seconds between
+# checks of the result overviews for new races
+RESULTS_DIR = os.path.join(DATA_DIR, 'results')
+RESULTS_REFRESH_INTERVAL = 3600
+
+# Seconds between event loop lag samples, and the lag in seconds after
+# which the stack of the blocking callback is logged
+LOOP_LAG_INTERVAL = 0.5
+LOOP_BLOCK_THRESHOLD = 0.25
+
+# Port of the Prometheus metrics endpoint, 0 disables it
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# Seconds between scheduler ticks of the update checker, each tick only
+# checks the titles that are due
+UPDATE_CHECK_TICK = 15
+
+# Seconds between passes over the update notification outbox
+OUTBOX_TICK = 5
+
+# Only one bot process runs the update checker. The processes elect it
+# through a lease in this SQLite file, which must be shared between them.
+# The leader renews the lease every LEADER_RENEW_INTERVAL seconds, and
+# another process takes over LEADER_LEASE_TTL seconds after it stops
+LEADER_LEASE_FILE = os.getenv('LEADER_LEASE_FILE', os.path.join(DATA_DIR, 'leader.db'))
+LEADER_LEASE_TTL = 60
+LEADER_RENEW_INTERVAL = 15
+
+# Website status, standings and update schedule saved for a fast restart,
+# and seconds between saves; the state is also saved at shutdown
+WARM_STATE_FILE = os.path.join(DATA_DIR, 'warm_state.json')
+WARM_STATE_INTERVAL = 300
+
+# Gateway and cache settings. 'lean' only subscribes to the guild and
+# message events the commands need and keeps no members or messages in
+# memory; 'full' receives the default events, caches and chunks all members
+# and keeps the last messages
+CACHE_PROFILES = {
+    'lean': {
+        'intents': 'minimal',
+        'members': False,
+        'member_cache': 'none',
+        'chunk_guilds_at_startup': False,
+        'max_messages': None,
+    },
+    'full': {
+        'intents': 'default',
+        'members': True,
+        'member_cache': 'intents',
+        'chunk_guilds_at_startup': True,
+        'max_messages': 1000,
+    },
+}
+CACHE_PROFILE = os.getenv('CACHE_PROFILE', 'lean')
+
+# Shard across gateway connections with AutoShardedBot. SHARD_COUNT 0 lets
+# Discord recommend a count; SHARD_IDS limits this process to some shards,
+# e.g. "0,1", so the shards can be split over several processes
+AUTO_SHARD = os.getenv('AUTO_SHARD', '0') == '1'
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '0'))
+SHARD_IDS = [int(shard) for shard in os.getenv('SHARD_IDS', '').split(',') if shard.strip()]
+
 
 def create_output_dir():
     try:
@@ -47,13 +138,9 @@ def load_config():
         else:
             level = logging.INFO
 
-        logging.basicConfig(
-            level=level,
-            format='[%(asctime)s][%(name)s] %(levelname)s: %(message)s'
-        )
+        # Imported here so that importing the config does not touch logging
+        from f1o.logs import setup_logging
+        setup_logging(level, LOG_FORMAT == 'json', LOG_SAMPLE_INTERVAL)
     except IOError:
         logger.critical(f'Could not load config.')
         sys.exit(0)
-
-
-load_config()
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLease:
+    """Elect a single leader among bot processes through a lease in SQLite.
+
+    Every process calls `renew` on an interval. The lease row names its
+    holder and an expiry time; a process takes the lease over when the row
+    is missing or expired, and the holder extends it on every renewal. If
+    the leader dies, another process becomes leader once the lease expires.
+
+    All processes must share the database file, e.g. on the same host or a
+    shared volume with working file locks.
+    """
+
+    def __init__(self, path, name='renovate', ttl=60):
+        self.path = path
+        self.name = name
+        self.ttl = ttl
+        self.holder = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.is_leader = False
+        # Wall-clock expiry of the lease as last written by this process
+        self.expires = 0.0
+        self.changes = 0
+        self._db = None
+        self._lock = asyncio.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(
+                self.path, timeout=10, isolation_level=None, check_same_thread=False
+            )
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS lease ('
+                'name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires REAL NOT NULL)'
+            )
+        return self._db
+
+    def _renew(self):
+        db = self._connect()
+        now = time.time()
+        # IMMEDIATE takes the write lock up front, so two processes cannot
+        # both see an expired lease and take it
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                'SELECT holder, expires FROM lease WHERE name = ?', (self.name,)
+            ).fetchone()
+            if row is None or row[0] == self.holder or row[1] < now:
+                db.execute(
+                    'INSERT OR REPLACE INTO lease (name, holder, expires) VALUES (?, ?, ?)',
+                    (self.name, self.holder, now + self.ttl)
+                )
+                leader = True
+            else:
+                leader = False
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return leader, now + self.ttl if leader else 0.0
+
+    def _release(self):
+        if self._db is None:
+            return
+        self._db.execute(
+            'DELETE FROM lease WHERE name = ? AND holder = ?', (self.name, self.holder)
+        )
+        self._db.close()
+        self._db = None
+
+    async def renew(self):
+        """Take or extend the lease, return whether this process is leader."""
+        try:
+            async with self._lock:
+                leader, expires = await asyncio.to_thread(self._renew)
+        except sqlite3.Error as e:
+            # Without a confirmed lease another process may be leader
+            logger.warning(f'Could not renew leader lease: {e}')
+            leader, expires = False, 0.0
+        if leader != self.is_leader:
+            self.changes += 1
+            logger.info(
+                f'{"Acquired" if leader else "Lost"} leader lease {self.name} as {self.holder}'
+            )
+        self.is_leader = leader
+        self.expires = expires
+        return leader
+
+    def holds(self):
+        """Return whether this process is leader and its lease has not expired.
+
+        Unlike is_leader this turns False on its own when renewals stop,
+        e.g. because the renewing loop died.
+        """
+        return self.is_leader and time.time() < self.expires
+
+    async def release(self):
+        """Give up the lease so another process can take over right away."""
+        if self.is_leader:
+            logger.info(f'Releasing leader lease {self.name}')
+        self.is_leader = False
+        self.expires = 0.0
+        try:
+            async with self._lock:
+                await asyncio.to_thread(self._release)
+        except sqlite3.Error as e:
+            logger.warning(f'Could not release leader lease: {e}')
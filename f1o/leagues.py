@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class _Snapshot:
+    """Immutable view of one version of the league data file."""
+
+    __slots__ = ('leagues', 'names', 'channels', 'signature', 'generation')
+
+    def __init__(self, leagues, channels, signature, generation):
+        self.leagues = leagues
+        self.names = list(leagues)
+        self.channels = channels
+        self.signature = signature
+        self.generation = generation
+
+
+class LeagueRegistry:
+    """Leagues and their channels, loaded from a JSON data file.
+
+    The file is parsed once into a league table and a channel ID -> league
+    index for the configured stage. `refresh` reloads it when the file
+    changes on disk and swaps in the new data in a single assignment, so
+    readers never see a half-loaded registry.
+    """
+
+    def __init__(self, path, stage):
+        self.path = path
+        self.stage = stage
+        self._snapshot = _Snapshot({}, {}, None, 0)
+        self.refresh()
+
+    @property
+    def generation(self):
+        """Increases every time the data file is reloaded."""
+        return self._snapshot.generation
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self):
+        """Reload the data file if it changed. Return True if it was reloaded."""
+        signature = self._signature()
+        if signature == self._snapshot.signature:
+            return False
+        if signature is None:
+            logger.warning(f"League data file {self.path} not found.")
+            return False
+
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+            leagues = data['leagues']
+            channels = {}
+            for channel_id, names in data.get('channels', {}).get(self.stage, {}).items():
+                # "*" routes a channel to every league
+                channels[int(channel_id)] = list(leagues) if names == '*' else list(names)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Keep serving the previous data until the file is fixed
+            logger.error(f"Could not load league data from {self.path}: {e}")
+            return False
+
+        self._snapshot = _Snapshot(
+            leagues, channels, signature, self._snapshot.generation + 1
+        )
+        logger.info(f"Loaded {len(leagues)} leagues from {self.path}.")
+        return True
+
+    def get(self, name):
+        """Return the data of a league, or None if it is unknown."""
+        return self._snapshot.leagues.get(name)
+
+    def names(self):
+        """Return all league names in file order."""
+        return self._snapshot.names
+
+    def for_channel(self, channel_id):
+        """Return the names of the leagues shown in a channel."""
+        return self._snapshot.channels.get(channel_id, [])
@@ -0,0 +1,108 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import time
+
+# Attributes every LogRecord has, anything else was passed through `extra`
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'taskName'
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as JSON lines, including the fields passed as `extra`."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key != 'sample':
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SampleFilter(logging.Filter):
+    """Let a record with a `sample` key through at most once per interval.
+
+    Used for steady-state messages repeated every cycle, whose counts are
+    reported in per-cycle summaries instead. Records without the key always
+    pass.
+    """
+
+    def __init__(self, interval=3600):
+        super().__init__()
+        self.interval = interval
+        self.last = {}
+        self.dropped = 0
+
+    def filter(self, record):
+        key = getattr(record, 'sample', None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        last = self.last.get(key)
+        if last is not None and now - last < self.interval:
+            self.dropped += 1
+            return False
+        self.last[key] = now
+        return True
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """Put records on the queue without formatting them.
+
+    The stock prepare() formats on the calling thread and folds the
+    traceback into the message. Here only the message arguments are
+    merged, since they may change after the call, and the listener's
+    formatter does the rest, including exc_info.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_listener = None
+
+
+def setup_logging(level, json_lines=True, sample_interval=3600):
+    """Route all records through a queue to a writer thread.
+
+    Logging calls on the event loop only put the record on a queue; a
+    QueueListener thread formats it and writes it to stderr.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    if json_lines:
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('[%(asctime)s][%(name)s] %(levelname)s: %(message)s'))
+
+    records = queue.SimpleQueue()
+    handler = RecordQueueHandler(records)
+    handler.addFilter(SampleFilter(sample_interval))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    # Flush what is still queued when the bot exits
+    atexit.register(_listener.stop)
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        )
+        for key, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+
+class MetricsWriter:
+    """Builds a response body in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.lines = []
+
+    def metric(self, name, kind, help, samples):
+        """Add a metric from an iterable of (labels, value) samples."""
+        self.lines.append(f'# HELP {name} {help}')
+        self.lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                continue
+            self.lines.append(f'{name}{_labels(labels)} {value}')
+
+    def histogram(self, name, help, histograms, bounds, scale=1.0):
+        """Add histograms given as (labels, bucket counts, count, sum) entries.
+
+        Bucket counts are per bucket, the last one is the overflow bucket.
+        """
+        self.lines.append(f'# HELP {name} {help}')
+        self.lines.append(f'# TYPE {name} histogram')
+        for labels, counts, count, total in histograms:
+            cumulative = 0
+            for bound, bucket in zip(bounds, counts):
+                cumulative += bucket
+                le = dict(labels, le=bound * scale)
+                self.lines.append(f'{name}_bucket{_labels(le)} {cumulative}')
+            self.lines.append(f'{name}_bucket{_labels(dict(labels, le="+Inf"))} {count}')
+            self.lines.append(f'{name}_sum{_labels(labels)} {total * scale}')
+            self.lines.append(f'{name}_count{_labels(labels)} {count}')
+
+    def render(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+class MetricsServer:
+    """Minimal HTTP server answering GET /metrics on the bot's event loop.
+
+    Metrics are collected only when scraped: `collect` receives a
+    MetricsWriter and reads the counters the bot already keeps, so there is
+    no per-event cost while nobody is scraping.
+    """
+
+    def __init__(self, host, port, collect):
+        self.host = host
+        self.port = port
+        self.collect = collect
+        self.server = None
+
+    async def start(self):
+        if self.server is not None:
+            return
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=5)
+            method, path = request.split(b' ', 2)[:2]
+            if method != b'GET' or path.split(b'?')[0] != b'/metrics':
+                status, body = '404 Not Found', b'Not Found\n'
+            else:
+                metrics = MetricsWriter()
+                self.collect(metrics)
+                status, body = '200 OK', metrics.render().encode()
+            writer.write(
+                f'HTTP/1.1 {status}\r\n'
+                f'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Connection: close\r\n\r\n'.encode() + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug(f"Metrics request failed, {e}")
+        finally:
+            writer.close()
@@ -0,0 +1,136 @@
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from f1o.util import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop runs scheduled callbacks.
+
+    A coroutine sleeps for a fixed interval and records how much later than
+    requested it woke up. A watchdog thread logs the stack of the event loop
+    thread whenever the loop has not woken up for longer than the threshold,
+    which points at the callback that blocks it.
+    """
+
+    def __init__(self, interval=0.5, threshold=0.25, history=600):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags = deque(maxlen=history)
+        self.stalls = 0
+        self._beat = None
+        self._loop_thread = None
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start measuring on the running event loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._watchdog = threading.Thread(
+            target=self._watch, name='loop-lag-watchdog', daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            self.lags.append(max(self._beat - start - self.interval, 0.0))
+
+    def _watch(self):
+        reported = None
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or reported == beat:
+                continue
+            # Only report each stall once
+            reported = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = ''.join(traceback.format_stack(frame)) if frame else 'unavailable'
+            logger.warning(
+                f"Event loop blocked for more than {blocked * 1000:.0f} ms:\n{stack}"
+            )
+
+    def percentiles(self, *ps):
+        """Return loop lag percentiles in ms."""
+        return tuple(
+            None if value is None else value * 1000
+            for value in (percentile(self.lags, p) for p in ps)
+        )
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed bucket bounds in ms."""
+
+    BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.BUCKETS, ms)] += 1
+        self.count += 1
+        self.sum += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        """Estimate a percentile as the upper bound of its bucket."""
+        if self.count == 0:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class CommandStats:
+    """Per-command latency histograms, keyed by the qualified command name."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.errors = {}
+
+    def record(self, name, seconds, failed=False):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.observe(seconds * 1000)
+        if failed:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def slowest(self, n=3, p=95):
+        """Return (name, percentile ms, count) of the n slowest commands."""
+        ranked = [
+            (name, histogram.percentile(p), histogram.count)
+            for name, histogram in self.histograms.items()
+        ]
+        ranked.sort(key=lambda entry: entry[1], reverse=True)
+        return ranked[:n]
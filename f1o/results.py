@@ -0,0 +1,345 @@
+import asyncio
+import bisect
+import logging
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from f1o.standings import parse_standings
+from f1o.util import client, lazy_import
+
+# NumPy is only loaded once results are first read or ingested
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Links on the result overview that point to the result of a single race
+RACE_LINK = re.compile(r'/league/results?/|[?&]raceID=', re.IGNORECASE)
+
+
+class _LinkParser(HTMLParser):
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self.links.append(href)
+
+
+def parse_race_links(html, base_url):
+    """Return the absolute URLs of all race result pages, in page order."""
+    parser = _LinkParser()
+    parser.feed(html)
+    links = (urljoin(base_url, href) for href in parser.links if RACE_LINK.search(href))
+    return [link for link in dict.fromkeys(links) if link != base_url]
+
+
+# Position stored for DNF, DSQ and other finishes without a place
+UNCLASSIFIED = -1
+
+
+def _to_number(text, default):
+    match = re.search(r'-?\d+(?:[.,]\d+)?', text or '')
+    return float(match.group().replace(',', '.')) if match else default
+
+
+def _to_position(text):
+    position = _to_number(text, UNCLASSIFIED)
+    return int(position) if position >= 1 else UNCLASSIFIED
+
+
+class LeagueResults:
+    """Race results of one league, stored column by column.
+
+    Every row is one driver in one race. Drivers and races are interned
+    into index arrays so that all aggregates are plain NumPy operations.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.races = []
+        self.drivers = []
+        self._driver_index = {}
+        self.race = np.zeros(0, dtype=np.int32)
+        self.driver = np.zeros(0, dtype=np.int32)
+        self.position = np.zeros(0, dtype=np.int16)
+        self.points = np.zeros(0, dtype=np.float32)
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with np.load(self.path, allow_pickle=False) as data:
+            self.races = data['races'].tolist()
+            self.drivers = data['drivers'].tolist()
+            self.race = data['race']
+            self.driver = data['driver']
+            # Stores written before UNCLASSIFIED kept those finishes as 0
+            self.position = np.where(data['position'] < 1, UNCLASSIFIED, data['position'])
+            self.points = data['points']
+        self._driver_index = {name: index for index, name in enumerate(self.drivers)}
+
+    def save(self):
+        """Write the store atomically next to its final path."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f'{self.path}.tmp.npz'
+        np.savez(
+            tmp,
+            races=np.array(self.races, dtype=str),
+            drivers=np.array(self.drivers, dtype=str),
+            race=self.race,
+            driver=self.driver,
+            position=self.position,
+            points=self.points,
+        )
+        os.replace(tmp, self.path)
+
+    def add_race(self, url, table):
+        """Append the standings rows of a race that has not been stored yet.
+
+        A race without rows is stored too, so it is not fetched again.
+        """
+        race = len(self.races)
+        self.races.append(url)
+        drivers = []
+        for row in table:
+            index = self._driver_index.get(row.driver)
+            if index is None:
+                index = self._driver_index[row.driver] = len(self.drivers)
+                self.drivers.append(row.driver)
+            drivers.append(index)
+
+        self.race = np.concatenate([self.race, np.full(len(table), race, dtype=np.int32)])
+        self.driver = np.concatenate([self.driver, np.array(drivers, dtype=np.int32)])
+        self.position = np.concatenate([self.position, np.array(
+            [_to_position(row.position) for row in table], dtype=np.int16)])
+        self.points = np.concatenate([self.points, np.array(
+            [_to_number(row.points, 0.0) for row in table], dtype=np.float32)])
+
+    def find_driver(self, name):
+        """Return the index of a driver, matching case-insensitively."""
+        index = self._driver_index.get(name)
+        if index is not None:
+            return index
+        lowered = name.lower()
+        for index, driver in enumerate(self.drivers):
+            if driver.lower() == lowered:
+                return index
+        return None
+
+    def driver_summary(self, driver):
+        """Aggregate the results of one driver, None if the driver has none."""
+        mask = self.driver == driver
+        races = int(mask.sum())
+        if races == 0:
+            return None
+        positions = self.position[mask]
+        points = self.points[mask]
+        # Position aggregates only cover the races the driver was classified in
+        classified = positions[positions != UNCLASSIFIED]
+        per_race = self.points_per_race()
+        return {
+            'driver': self.drivers[driver],
+            'races': races,
+            'classified': int(classified.size),
+            'average_position': float(classified.mean()) if classified.size else None,
+            'best_position': int(classified.min()) if classified.size else None,
+            # Standard deviation of the finishing position, lower is steadier
+            'consistency': float(classified.std()) if classified.size else None,
+            'points': float(points.sum()),
+            'points_per_race': float(points.mean()),
+            'wins': int((classified == 1).sum()),
+            'podiums': int((classified <= 3).sum()),
+            # Rank by points per race among all drivers of the league
+            'rank': int((per_race > per_race[driver]).sum()) + 1,
+            'drivers': len(self.drivers),
+        }
+
+    def head_to_head(self, a, b):
+        """Compare two drivers in the races they both drove.
+
+        A classified finish is ahead of an unclassified one. The average
+        gap only covers the races both were classified in.
+        """
+        races_a, rows_a = np.unique(self.race[self.driver == a], return_index=True)
+        races_b, rows_b = np.unique(self.race[self.driver == b], return_index=True)
+        positions_a = self.position[self.driver == a][rows_a]
+        positions_b = self.position[self.driver == b][rows_b]
+        common, in_a, in_b = np.intersect1d(races_a, races_b, return_indices=True)
+        pa = positions_a[in_a].astype(np.int32)
+        pb = positions_b[in_b].astype(np.int32)
+        # Rank unclassified finishes behind every classified one
+        last = np.iinfo(np.int32).max
+        ra = np.where(pa == UNCLASSIFIED, last, pa)
+        rb = np.where(pb == UNCLASSIFIED, last, pb)
+        both = (pa != UNCLASSIFIED) & (pb != UNCLASSIFIED)
+        return {
+            'races': int(common.size),
+            'ahead_a': int((ra < rb).sum()),
+            'ahead_b': int((rb < ra).sum()),
+            'classified': int(both.sum()),
+            'average_gap': float((pb[both] - pa[both]).mean()) if both.any() else 0.0,
+        }
+
+    def points_per_race(self):
+        """Return average points per race for every driver index."""
+        if self.driver.size == 0:
+            return np.zeros(0, dtype=np.float64)
+        count = np.bincount(self.driver, minlength=len(self.drivers))
+        total = np.bincount(self.driver, weights=self.points, minlength=len(self.drivers))
+        return np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+
+
+class ResultsEngine:
+    """Incrementally ingests race results of all leagues into columnar stores."""
+
+    def __init__(self, registry, directory):
+        self.registry = registry
+        self.directory = directory
+        self.leagues = {}
+        # Loads in flight, so concurrent callers share one store per league
+        self._loading = {}
+        self._preload = None
+        self._lock = asyncio.Lock()
+        # Sorted (lower case, name) of the drivers of all loaded leagues,
+        # searched by prefix for autocomplete
+        self.driver_index = []
+        self._indexed = set()
+
+    async def league(self, liga):
+        """Return the store of a league, loading it from disk on first use.
+
+        Raise KeyError for leagues the registry does not know, the name
+        becomes part of a file path.
+        """
+        store = self.leagues.get(liga)
+        if store is not None:
+            return store
+        if self.registry.get(liga) is None:
+            raise KeyError(liga)
+        loading = self._loading.get(liga)
+        if loading is None:
+            loading = self._loading[liga] = asyncio.ensure_future(self._load(liga))
+        # A cancelled caller must not cancel the load the others wait for
+        return await asyncio.shield(loading)
+
+    async def _load(self, liga):
+        try:
+            store = await asyncio.to_thread(
+                LeagueResults, os.path.join(self.directory, f'{liga}.npz')
+            )
+            self.leagues[liga] = store
+            self._index(store)
+            return store
+        finally:
+            self._loading.pop(liga, None)
+
+    async def load_all(self):
+        """Load the stores of all leagues, filling the driver index."""
+        for liga in self.registry.names():
+            try:
+                await self.league(liga)
+            except Exception as e:
+                logger.warning(f'Could not load results of {liga}: {e}')
+
+    def preload(self):
+        """Start loading all stores in the background, once, and return the task."""
+        if self._preload is None:
+            self._preload = asyncio.ensure_future(self.load_all())
+        return self._preload
+
+    def _index(self, store):
+        for name in store.drivers:
+            if name not in self._indexed:
+                self._indexed.add(name)
+                bisect.insort(self.driver_index, (name.lower(), name))
+
+    def complete_driver(self, prefix, limit=25):
+        """Return up to limit driver names starting with prefix, ignoring case."""
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.driver_index, (prefix,))
+        names = []
+        for lowered, name in self.driver_index[start:start + limit]:
+            if not lowered.startswith(prefix):
+                break
+            names.append(name)
+        return names
+
+    async def _get(self, url):
+        res = await client.pool.Async().get(url, timeout=15.0)
+        res.raise_for_status()
+        return res.text
+
+    async def ingest(self, liga):
+        """Fetch the race result pages of a league that are not stored yet.
+
+        Return the number of new races.
+        """
+        async with self._lock:
+            store = await self.league(liga)
+            overview = self.registry.get(liga)['result_overview_URL']
+            links = parse_race_links(await self._get(overview), overview)
+            seen = set(store.races)
+            new = [link for link in links if link not in seen]
+            for link in new:
+                table = await asyncio.to_thread(parse_standings, await self._get(link))
+                store.add_race(link, table)
+            if new:
+                self._index(store)
+                await asyncio.to_thread(store.save)
+                logger.info(f'Ingested {len(new)} new races of {liga}.')
+            return len(new)
+
+    async def ingest_all(self):
+        for liga in self.registry.names():
+            try:
+                await self.ingest(liga)
+            except Exception as e:
+                logger.warning(f'Could not ingest results of {liga}: {e}')
+
+    async def driver_leagues(self, name, ligas=None):
+        """Return (league, summary) for every league the driver raced in."""
+        summaries = []
+        for liga in ligas or self.registry.names():
+            try:
+                store = await self.league(liga)
+            except KeyError:
+                continue
+            driver = store.find_driver(name)
+            if driver is not None:
+                summaries.append((liga, store.driver_summary(driver)))
+        return summaries
+
+    async def head_to_head(self, a, b, ligas=None):
+        """Compare two drivers over all leagues they both raced in.
+
+        Return (names, totals) or None if they never met.
+        """
+        names = None
+        totals = {'races': 0, 'ahead_a': 0, 'ahead_b': 0, 'classified': 0, 'gap_sum': 0.0}
+        for liga in ligas or self.registry.names():
+            try:
+                store = await self.league(liga)
+            except KeyError:
+                continue
+            index_a, index_b = store.find_driver(a), store.find_driver(b)
+            if index_a is None or index_b is None:
+                continue
+            duel = store.head_to_head(index_a, index_b)
+            if duel['races'] == 0:
+                continue
+            names = (store.drivers[index_a], store.drivers[index_b])
+            totals['races'] += duel['races']
+            totals['ahead_a'] += duel['ahead_a']
+            totals['ahead_b'] += duel['ahead_b']
+            totals['classified'] += duel['classified']
+            totals['gap_sum'] += duel['average_gap'] * duel['classified']
+        if names is None:
+            return None
+        gap_sum = totals.pop('gap_sum')
+        totals['average_gap'] = gap_sum / totals['classified'] if totals['classified'] else 0.0
+        return names, totals
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WarmState:
+    """State saved on an interval and at shutdown, restored on startup.
+
+    Lets a restarted bot answer commands from the last known website
+    status, standings and update schedule instead of fetching everything
+    again before its first reply.
+    """
+
+    def __init__(self, path, max_age=86400):
+        self.path = path
+        self.max_age = max_age
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f'Could not read warm state from {self.path}: {e}')
+            return {}
+        age = time.time() - state.get('saved_at', 0)
+        if age > self.max_age:
+            logger.info(f'Ignoring warm state saved {int(age)}s ago.')
+            return {}
+        return state
+
+    def _save(self, state):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(dict(state, saved_at=time.time()), f)
+        os.replace(tmp, self.path)
+
+    async def load(self):
+        """Return the saved state, or an empty dict if there is none usable."""
+        return await asyncio.to_thread(self._load)
+
+    async def save(self, state):
+        try:
+            await asyncio.to_thread(self._save, state)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f'Could not save warm state to {self.path}: {e}')
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from collections import namedtuple
+from html.parser import HTMLParser
+
+from f1o.util import Coalescer, client
+
+logger = logging.getLogger(__name__)
+
+Standing = namedtuple('Standing', ['position', 'driver', 'team', 'points'])
+
+# Header texts that identify each column, compared in lower case
+COLUMNS = {
+    'position': ('pos', 'platz', 'rang', '#'),
+    'driver': ('fahrer', 'driver', 'name'),
+    'team': ('team', 'rennstall'),
+    'points': ('punkte', 'points', 'pkt', 'pts'),
+}
+
+
+class _TableParser(HTMLParser):
+    """Collect the cell texts of every table, rows grouped per table."""
+
+    def __init__(self):
+        super().__init__()
+        self.tables = []
+        self._open = []
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            self._close_row()
+            self._open.append([])
+        elif self._open and tag == 'tr':
+            # End tags of cells and rows are optional in HTML
+            self._close_row()
+            self._row = []
+        elif self._row is not None and tag in ('td', 'th'):
+            self._close_cell()
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th'):
+            self._close_cell()
+        elif tag == 'tr':
+            self._close_row()
+        elif tag == 'table' and self._open:
+            self._close_row()
+            self.tables.append(self._open.pop())
+
+    def _close_cell(self):
+        if self._cell is not None:
+            self._row.append(' '.join(''.join(self._cell).split()))
+            self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row is not None:
+            if self._row:
+                self._open[-1].append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def _column_index(header):
+    """Map each known column to its index in the header row."""
+    index = {}
+    for position, text in enumerate(cell.lower() for cell in header):
+        for column, names in COLUMNS.items():
+            if column not in index and any(text.startswith(name) for name in names):
+                index[column] = position
+    return index
+
+
+def parse_standings(html):
+    """Parse a standings page into a list of Standing rows."""
+    parser = _TableParser()
+    parser.feed(html)
+    tables = [rows for rows in parser.tables if len(rows) >= 2]
+    if not tables:
+        return []
+
+    # Prefer the first table whose header names a driver column, otherwise
+    # assume the largest table in the usual column order
+    for rows in tables:
+        index = _column_index(rows[0])
+        if 'driver' in index:
+            break
+    else:
+        rows = max(tables, key=len)
+        index = {'position': 0, 'driver': 1, 'team': 2, 'points': len(rows[0]) - 1}
+
+    header, *rows = rows
+
+    def cell(row, column):
+        position = index.get(column)
+        if position is None or position >= len(row):
+            return ''
+        return row[position]
+
+    table = []
+    for row in rows:
+        driver = cell(row, 'driver')
+        if not driver:
+            continue
+        table.append(Standing(
+            cell(row, 'position').rstrip('.') or str(len(table) + 1),
+            driver,
+            cell(row, 'team'),
+            cell(row, 'points'),
+        ))
+    return table
+
+
+async def fetch_standings(url, timeout=10.0):
+    """Download and parse a standings page."""
+    res = await client.pool.Async().get(url, timeout=timeout)
+    res.raise_for_status()
+    # Parsing a full page takes long enough to be noticed on the event loop
+    return await asyncio.to_thread(parse_standings, res.text)
+
+
+class StandingsCache:
+    """Parsed standings tables per league, kept in memory with a TTL.
+
+    `get` answers from memory whenever a table is cached, even an expired
+    one; expired tables are refreshed by `refresh_expired`, which the bot
+    runs in the background. Only the very first request for a league waits
+    for the website, and concurrent first requests share one download.
+    """
+
+    def __init__(self, registry, ttl=900, fetch=fetch_standings):
+        self.registry = registry
+        self.ttl = ttl
+        self.fetch = fetch
+        self.tables = {}
+        self._requests = Coalescer()
+
+    async def _load(self, liga):
+        url = self.registry.get(liga)['current_standing_URL']
+        table = await self._requests.run(liga, lambda: self.fetch(url))
+        self.tables[liga] = (table, time.time())
+        return table
+
+    async def get(self, liga):
+        """Return (table, fetched_at) of a league."""
+        if self.registry.get(liga) is None:
+            raise KeyError(liga)
+        if liga not in self.tables:
+            await self._load(liga)
+        return self.tables[liga]
+
+    def export(self):
+        return {
+            liga: [[list(row) for row in table], fetched_at]
+            for liga, (table, fetched_at) in self.tables.items()
+        }
+
+    def restore(self, state):
+        """Serve exported tables, expired ones are refreshed as usual."""
+        for liga, (rows, fetched_at) in (state or {}).items():
+            if liga not in self.tables and self.registry.get(liga) is not None:
+                self.tables[liga] = ([Standing(*row) for row in rows], fetched_at)
+
+    async def refresh_expired(self):
+        """Reload every cached table that is older than the TTL."""
+        now = time.time()
+        for liga, (_, fetched_at) in list(self.tables.items()):
+            if now - fetched_at < self.ttl:
+                continue
+            if self.registry.get(liga) is None:
+                del self.tables[liga]
+                continue
+            try:
+                await self._load(liga)
+            except Exception as e:
+                # Keep serving the last table until the website recovers
+                logger.warning(f"Could not refresh standings of {liga}: {e}")
@@ -1,7 +1,157 @@
-import urllib.request
+import asyncio
+import importlib.util
+import logging
+import math
+import resource
+import sys
+import time
+from collections import deque
+from typing import Deque, Iterable, Optional
 
+logger = logging.getLogger(__name__)
 
-async def check_f1owebite_status():
-    code = urllib.request.urlopen("https://www.f1-onlineliga.com/").getcode()
-    return code
 
+def percentile(values: Iterable[float], p: float) -> Optional[float]:
+    """Return the p-th percentile (0-100) of values using the nearest-rank method."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def lazy_import(name):
+    """Return a module that is only executed when one of its attributes is used."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# The HTTP stack (httpx) is only loaded when a request is first made
+client = lazy_import('updatechecker.client')
+
+
+def resident_memory() -> Optional[int]:
+    """Return the resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        pass
+    # Without procfs fall back to the peak, reported in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class WebsiteProbe:
+    """Check a website on an interval and keep the last result in memory.
+
+    Commands read the cached values instead of waiting on the website, so a
+    slow or unreachable site never holds up the bot.
+    """
+
+    def __init__(self, url, timeout=5.0, history=60):
+        self.url = url
+        self.timeout = timeout
+        self.status: Optional[int] = None
+        self.checked_at: Optional[float] = None
+        self.latencies: Deque[float] = deque(maxlen=history)
+
+    async def probe(self):
+        """Request the website once and record status code and latency."""
+        start = time.perf_counter()
+        try:
+            res = await asyncio.wait_for(
+                client.pool.Async().get(self.url, timeout=self.timeout),
+                timeout=self.timeout
+            )
+            status = res.status_code
+        except Exception as e:
+            logger.info(f"Website probe for {self.url} failed, {e}")
+            status = None
+        latency = (time.perf_counter() - start) * 1000
+
+        self.status = status
+        self.checked_at = time.time()
+        if status is not None:
+            self.latencies.append(latency)
+        return status
+
+    def export(self):
+        return {'status': self.status, 'checked_at': self.checked_at,
+                'latencies': list(self.latencies)}
+
+    def restore(self, state):
+        """Resume from exported results until the next probe completes."""
+        if self.checked_at is not None or not state:
+            return
+        self.status = state['status']
+        self.checked_at = state['checked_at']
+        self.latencies.extend(state['latencies'])
+
+    def age(self):
+        """Seconds since the last completed probe, or None if never probed."""
+        if self.checked_at is None:
+            return None
+        return time.time() - self.checked_at
+
+    def latency_percentiles(self, *ps):
+        """Return response time percentiles in ms for the recorded history."""
+        return tuple(percentile(self.latencies, p) for p in ps)
+
+
+class Coalescer:
+    """Share one in-flight call between concurrent callers with the same key."""
+
+    def __init__(self):
+        self._pending = {}
+
+    async def run(self, key, factory):
+        """Await factory() once for all callers that arrive while it runs."""
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # Shielded so a cancelled caller does not cancel the other waiters
+        return await asyncio.shield(task)
+
+
+class TTLCached:
+    """Cache the result of a coroutine function for ttl seconds.
+
+    Concurrent calls on a cold or expired cache share a single call.
+    """
+
+    def __init__(self, factory, ttl):
+        self.factory = factory
+        self.ttl = ttl
+        self.value = None
+        self.expires = 0.0
+        self._coalescer = Coalescer()
+
+    async def get(self):
+        if time.monotonic() < self.expires:
+            return self.value
+        value = await self._coalescer.run(None, self.factory)
+        if time.monotonic() >= self.expires:
+            self.value = value
+            self.expires = time.monotonic() + self.ttl
+        return value
+
+    def invalidate(self):
+        self.expires = 0.0
+
+
+async def check_f1owebite_status(probe: WebsiteProbe):
+    """Return the cached status code, probing once if there is no result yet."""
+    if probe.checked_at is None:
+        await probe.probe()
+    return probe.status
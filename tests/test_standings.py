@@ -0,0 +1,102 @@
+import asyncio
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from f1o.standings import Standing, StandingsCache, fetch_standings, parse_standings
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    """Serve the fixtures directory on a free local port."""
+    handler = functools.partial(QuietHandler, directory=FIXTURES)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class Registry:
+
+    def __init__(self, leagues):
+        self.leagues = leagues
+
+    def get(self, liga):
+        return self.leagues.get(liga)
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_fetch_standings(server):
+    table = asyncio.run(fetch_standings(f'{server}/standings.html'))
+
+    assert table == [
+        Standing('1', 'Max Mustermann', 'Red Bull Racing', '143'),
+        Standing('2', 'Maria Beispiel', 'Mercedes-AMG', '128'),
+        Standing('3', 'Jörg Übermann', 'Scuderia Ferrari', '97,5'),
+    ]
+
+
+def test_fetch_missing_page(server):
+    with pytest.raises(Exception):
+        asyncio.run(fetch_standings(f'{server}/missing.html'))
+
+
+def test_cache_answers_from_memory(server):
+    fetches = []
+
+    async def fetch(url):
+        fetches.append(url)
+        return await fetch_standings(url)
+
+    url = f'{server}/standings.html'
+    cache = StandingsCache(Registry({'FH3-100': {'current_standing_URL': url}}), fetch=fetch)
+
+    async def run():
+        first, _ = await cache.get('FH3-100')
+        second, _ = await cache.get('FH3-100')
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first is second
+    assert fetches == [url]
+    with pytest.raises(KeyError):
+        asyncio.run(cache.get('FH1-50'))
+
+
+def test_parse_malformed_table():
+    table = parse_standings(read_fixture('standings_malformed.html'))
+
+    # Unclosed cells and rows end at the next one, rows without a driver
+    # are skipped and missing cells stay empty
+    assert table == [
+        Standing('1', 'Anna Schnell', 'McLaren', '50'),
+        Standing('2', 'Ben Langsam', '', ''),
+        Standing('4', 'Carl Mitte', 'Williams', '8'),
+    ]
+
+
+def test_parse_empty_table():
+    assert parse_standings(read_fixture('standings_empty.html')) == []
+
+
+@pytest.mark.parametrize('html', ['', '<html><body>Wartungsarbeiten</body></html>', '<table><tr>'])
+def test_parse_without_table(html):
+    assert parse_standings(html) == []
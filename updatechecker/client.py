@@ -0,0 +1,232 @@
+import asyncio
+import concurrent.futures
+import importlib.util
+import ssl
+from time import monotonic
+from typing import Any, Dict, Optional, Set
+from urllib.parse import urlsplit
+
+import httpx
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPClient:
+    """
+    Long-lived HTTP clients shared by Renovate.
+
+    Both the sync and async clients keep a per-host pool of keep-alive
+    connections, so repeated requests to orbispatches.com and the Discord
+    webhook host reuse an established TCP+TLS connection instead of
+    performing a new handshake every time.
+    """
+
+    DEFAULTS: Dict[str, Any] = {
+        "maxConnections": 20,
+        "maxKeepaliveConnections": 10,
+        "keepaliveExpiry": 30.0,
+        "timeout": 30.0,
+        "connectTimeout": 10.0,
+        "http2": False,
+    }
+
+    def __init__(self: Any, settings: Optional[Dict[str, Any]] = None) -> None:
+        self.settings: Dict[str, Any] = {**HTTPClient.DEFAULTS, **(settings or {})}
+
+        self._sync: Optional[httpx.Client] = None
+        self._async: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Shared by every client, loading the CA bundle takes long enough to
+        # stall the event loop whenever a client is built
+        self._ssl: Optional[ssl.SSLContext] = None
+
+        self.hosts: Dict[str, Dict[str, int]] = {}
+
+        # Replaced async clients waiting for their requests to finish
+        self._retiring: Set[concurrent.futures.Future] = set()
+
+    def Configure(self: Any, settings: Optional[Dict[str, Any]]) -> None:
+        """Apply pool settings, rebuilding the clients only when they change."""
+
+        merged: Dict[str, Any] = {**HTTPClient.DEFAULTS, **(settings or {})}
+
+        if merged == self.settings:
+            return
+
+        grace: float = self.settings["timeout"]
+
+        self.settings = merged
+
+        if self._sync is not None:
+            self._sync.close()
+
+        # The async client is closed on its own loop once the requests
+        # still using it are done, or at the latest after its timeout
+        if self._async is not None and self._loop is not None and not self._loop.is_closed():
+            retiring: concurrent.futures.Future = asyncio.run_coroutine_threadsafe(
+                HTTPClient._Retire(self._async, grace), self._loop
+            )
+            self._retiring.add(retiring)
+            retiring.add_done_callback(self._retiring.discard)
+
+        self._sync = None
+        self._async = None
+        self._loop = None
+
+        logger.info(f"Reconfigured HTTP client pool, {merged}")
+
+    def Sync(self: Any) -> httpx.Client:
+        """Return the shared synchronous client."""
+
+        if self._sync is None:
+            self._sync = httpx.Client(
+                **self._options(),
+                event_hooks={"request": [self._hook], "response": []},
+            )
+
+        return self._sync
+
+    def Async(self: Any) -> httpx.AsyncClient:
+        """Return the shared asynchronous client for the running event loop."""
+
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+
+        # Connections are bound to the loop that opened them
+        if self._async is None or self._loop is not loop:
+            self._async = httpx.AsyncClient(
+                **self._options(),
+                event_hooks={"request": [self._hookAsync], "response": []},
+            )
+            self._loop = loop
+
+        return self._async
+
+    async def Warm(self: Any) -> None:
+        """Load the CA bundle in a thread, before the first client is built."""
+
+        if self._ssl is None:
+            self._ssl = await asyncio.to_thread(httpx.create_ssl_context)
+
+    def Close(self: Any) -> None:
+        """Close the synchronous client and its pooled connections."""
+
+        if self._sync is not None:
+            self._sync.close()
+            self._sync = None
+
+    async def AsyncClose(self: Any) -> None:
+        """Close the asynchronous client and its pooled connections."""
+
+        if self._async is not None:
+            await self._async.aclose()
+            self._async = None
+            self._loop = None
+
+    def Stats(self: Any) -> Dict[str, Any]:
+        """Report request and connection reuse counters per host."""
+
+        requests: int = sum(host["requests"] for host in self.hosts.values())
+        connections: int = sum(host["connections"] for host in self.hosts.values())
+
+        return {
+            "requests": requests,
+            "connections": connections,
+            "reused": max(requests - connections, 0),
+            "reuseRatio": (
+                round(1 - connections / requests, 3) if requests > 0 else 0.0
+            ),
+            "open": HTTPClient._OpenConnections(self._sync)
+            + HTTPClient._OpenConnections(self._async),
+            "hosts": {name: dict(host) for name, host in self.hosts.items()},
+        }
+
+    @staticmethod
+    async def _Retire(client: httpx.AsyncClient, grace: float) -> None:
+        """Close a replaced client once no request is using it anymore."""
+
+        deadline: float = monotonic() + grace
+
+        while HTTPClient._ActiveRequests(client) > 0 and monotonic() < deadline:
+            await asyncio.sleep(0.5)
+
+        await client.aclose()
+
+    def _options(self: Any) -> Dict[str, Any]:
+        """Build the keyword arguments shared by the sync and async clients."""
+
+        settings: Dict[str, Any] = self.settings
+        http2: bool = bool(settings["http2"])
+
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the h2 package is missing, using HTTP/1.1")
+
+            http2 = False
+
+        if self._ssl is None:
+            self._ssl = httpx.create_ssl_context()
+
+        return {
+            "http2": http2,
+            "verify": self._ssl,
+            "follow_redirects": True,
+            "timeout": httpx.Timeout(
+                settings["timeout"], connect=settings["connectTimeout"]
+            ),
+            "limits": httpx.Limits(
+                max_connections=settings["maxConnections"],
+                max_keepalive_connections=settings["maxKeepaliveConnections"],
+                keepalive_expiry=settings["keepaliveExpiry"],
+            ),
+        }
+
+    def _host(self: Any, url: Any) -> Dict[str, int]:
+        name: str = urlsplit(str(url)).netloc
+
+        host: Optional[Dict[str, int]] = self.hosts.get(name)
+
+        if host is None:
+            host = self.hosts[name] = {"requests": 0, "connections": 0}
+
+        return host
+
+    def _hook(self: Any, request: httpx.Request) -> None:
+        host: Dict[str, int] = self._host(request.url)
+        host["requests"] += 1
+
+        def trace(event: str, info: Dict[str, Any]) -> None:
+            if event == "connection.connect_tcp.complete":
+                host["connections"] += 1
+
+        request.extensions["trace"] = trace
+
+    async def _hookAsync(self: Any, request: httpx.Request) -> None:
+        host: Dict[str, int] = self._host(request.url)
+        host["requests"] += 1
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            if event == "connection.connect_tcp.complete":
+                host["connections"] += 1
+
+        request.extensions["trace"] = trace
+
+    @staticmethod
+    def _OpenConnections(client: Any) -> int:
+        """Count the connections currently held by a client's pool."""
+
+        pool: Any = getattr(getattr(client, "_transport", None), "_pool", None)
+
+        return len(getattr(pool, "connections", []))
+
+    @staticmethod
+    def _ActiveRequests(client: Any) -> int:
+        """Count the requests currently waiting on or using a client's pool."""
+
+        pool: Any = getattr(getattr(client, "_transport", None), "_pool", None)
+
+        return len(getattr(pool, "_requests", []))
+
+
+# Process-wide pool used by Utility
+pool: HTTPClient = HTTPClient()
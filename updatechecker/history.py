@@ -0,0 +1,427 @@
+import json
+import os
+import re
+import sqlite3
+from time import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+PLATFORMS: List[str] = ["battle", "prospero", "orbis", "steam"]
+
+# Stable location, independent of the working directory the bot starts in
+DEFAULT_PATH: str = os.path.join(os.path.dirname(__file__), "history.db")
+
+# Title history files written by earlier versions, imported once
+LEGACY_PATHS: List[str] = [
+    os.path.join(os.path.dirname(__file__), "history.json"),
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "history.json"),
+    os.path.join(os.getcwd(), "history.json"),
+]
+
+
+class HistoryStore:
+    """
+    Last seen title versions and their HTTP validators, the timeline of
+    every observed version transition, the version each subscriber was last
+    notified about and the outbox of notifications still to be delivered,
+    kept in an SQLite database in WAL mode.
+
+    The changes of an update cycle are flushed together in one transaction,
+    so a crash can at most lose the flush in progress, never the history
+    already written.
+    """
+
+    def __init__(self: Any, path: str = DEFAULT_PATH, readOnly: bool = False) -> None:
+        self.path: str = path
+
+        if readOnly:
+            # For processes that only read what the update checker wrote.
+            # Shared across worker threads, the caller serializes access.
+            self.db: sqlite3.Connection = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            )
+
+            return
+
+        self.db: sqlite3.Connection = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+
+        with self.db:
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS titles (
+                    platform TEXT NOT NULL,
+                    titleId TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    etag TEXT,
+                    lastModified TEXT,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (platform, titleId)
+                )
+                """
+            )
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS seen (
+                    subscriber TEXT NOT NULL,
+                    platform TEXT NOT NULL,
+                    titleId TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (subscriber, platform, titleId)
+                )
+                """
+            )
+            # One row per transition, read incrementally by id
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS timeline (
+                    id INTEGER PRIMARY KEY,
+                    platform TEXT NOT NULL,
+                    titleId TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    previous TEXT,
+                    observed REAL NOT NULL
+                )
+                """
+            )
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS outbox (
+                    key TEXT PRIMARY KEY,
+                    subscriber TEXT NOT NULL,
+                    platform TEXT NOT NULL,
+                    titleId TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    webhookUrl TEXT NOT NULL,
+                    username TEXT,
+                    embed TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    nextAttempt REAL NOT NULL,
+                    created REAL NOT NULL,
+                    delivered REAL
+                )
+                """
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS outboxDue ON outbox (nextAttempt) "
+                "WHERE delivered IS NULL"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+
+    def Load(self: Any) -> Dict[str, Any]:
+        """Return the history in the layout used by Renovate."""
+
+        history: Dict[str, Any] = {platform: {} for platform in PLATFORMS}
+        history["validators"] = {platform: {} for platform in PLATFORMS}
+
+        rows = self.db.execute(
+            "SELECT platform, titleId, version, etag, lastModified FROM titles"
+        )
+
+        for platform, titleId, version, etag, lastModified in rows:
+            history.setdefault(platform, {})[titleId] = version
+            history["validators"].setdefault(platform, {})[titleId] = (
+                HistoryStore._Validators(etag, lastModified)
+            )
+
+        # {subscriber: {platform: {titleId: version}}}
+        history["seen"] = {}
+
+        rows = self.db.execute("SELECT subscriber, platform, titleId, version FROM seen")
+
+        for subscriber, platform, titleId, version in rows:
+            history["seen"].setdefault(subscriber, {}).setdefault(platform, {})[
+                titleId
+            ] = version
+
+        return history
+
+    def Save(
+        self: Any,
+        titles: Iterable[Tuple[str, str, str, Optional[Dict[str, str]]]],
+    ) -> int:
+        """
+        Persist (platform, titleId, version, validators) entries in one
+        transaction and return how many were written.
+        """
+
+        with self.db:
+            return self._SaveTitles(titles)
+
+    def Flush(
+        self: Any,
+        titles: Iterable[Tuple[str, str, str, Optional[Dict[str, str]]]],
+        seen: Iterable[Tuple[str, str, str, str]],
+        notifications: Iterable[Dict[str, Any]],
+        transitions: Iterable[Tuple[str, str, str, Optional[str], float]] = (),
+    ) -> int:
+        """
+        Persist title versions, seen versions, new outbox notifications and
+        (platform, titleId, version, previous, observed) transitions in a
+        single transaction, so a notification is recorded if and only if the
+        change that caused it is. Return how many titles were written.
+        """
+
+        with self.db:
+            count: int = self._SaveTitles(titles)
+            self._SaveSeen(seen)
+            self._Enqueue(notifications)
+            self.db.executemany(
+                """
+                INSERT INTO timeline (platform, titleId, version, previous, observed)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                transitions,
+            )
+
+        return count
+
+    def TimelineSince(
+        self: Any, rowId: int
+    ) -> List[Tuple[int, str, str, str, Optional[str], float]]:
+        """Return the transitions stored after a row id, in id order."""
+
+        return self.db.execute(
+            """
+            SELECT id, platform, titleId, version, previous, observed FROM timeline
+            WHERE id > ? ORDER BY id
+            """,
+            (rowId,),
+        ).fetchall()
+
+    def SeedTimeline(self: Any) -> int:
+        """
+        Start an empty timeline with the versions already in the history, as
+        of their last update. Return how many were added.
+        """
+
+        with self.db:
+            return self.db.execute(
+                """
+                INSERT INTO timeline (platform, titleId, version, previous, observed)
+                SELECT platform, titleId, version, NULL, updated FROM titles
+                WHERE NOT EXISTS (SELECT 1 FROM timeline)
+                """
+            ).rowcount
+
+    def _SaveTitles(
+        self: Any,
+        titles: Iterable[Tuple[str, str, str, Optional[Dict[str, str]]]],
+    ) -> int:
+        now: float = time()
+
+        rows = [
+            (
+                platform,
+                titleId,
+                version,
+                (validators or {}).get("etag"),
+                (validators or {}).get("lastModified"),
+                now,
+            )
+            for platform, titleId, version, validators in titles
+        ]
+
+        self.db.executemany(
+            """
+            INSERT INTO titles (platform, titleId, version, etag, lastModified, updated)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (platform, titleId) DO UPDATE SET
+                version = excluded.version,
+                etag = excluded.etag,
+                lastModified = excluded.lastModified,
+                updated = excluded.updated
+            """,
+            rows,
+        )
+
+        return len(rows)
+
+    def _SaveSeen(self: Any, entries: Iterable[Tuple[str, str, str, str]]) -> int:
+        now: float = time()
+
+        rows = [
+            (subscriber, platform, titleId, version, now)
+            for subscriber, platform, titleId, version in entries
+        ]
+
+        self.db.executemany(
+            """
+            INSERT INTO seen (subscriber, platform, titleId, version, updated)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (subscriber, platform, titleId) DO UPDATE SET
+                version = excluded.version,
+                updated = excluded.updated
+            """,
+            rows,
+        )
+
+        return len(rows)
+
+    def _Enqueue(self: Any, notifications: Iterable[Dict[str, Any]]) -> None:
+        now: float = time()
+
+        # A notification that was already enqueued keeps its delivery state
+        self.db.executemany(
+            """
+            INSERT OR IGNORE INTO outbox (
+                key, subscriber, platform, titleId, version, webhookUrl, username,
+                embed, nextAttempt, created
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    notification["key"],
+                    notification["subscriber"],
+                    notification["platform"],
+                    notification["titleId"],
+                    notification["version"],
+                    notification["webhookUrl"],
+                    notification["username"],
+                    json.dumps(notification["embed"]),
+                    now,
+                    now,
+                )
+                for notification in notifications
+            ],
+        )
+
+    def OutboxDue(self: Any, now: float, limit: int) -> List[Dict[str, Any]]:
+        """Return undelivered notifications whose next attempt is due, oldest first."""
+
+        rows = self.db.execute(
+            """
+            SELECT key, webhookUrl, username, embed, attempts FROM outbox
+            WHERE delivered IS NULL AND nextAttempt <= ?
+            ORDER BY nextAttempt, created LIMIT ?
+            """,
+            (now, limit),
+        )
+
+        return [
+            {
+                "key": key,
+                "webhookUrl": webhookUrl,
+                "username": username,
+                "embed": json.loads(embed),
+                "attempts": attempts,
+            }
+            for key, webhookUrl, username, embed, attempts in rows
+        ]
+
+    def OutboxDelivered(self: Any, keys: Iterable[str]) -> None:
+        with self.db:
+            self.db.executemany(
+                "UPDATE outbox SET delivered = ?, attempts = attempts + 1 WHERE key = ?",
+                [(time(), key) for key in keys],
+            )
+
+    def OutboxRetry(self: Any, retries: Iterable[Tuple[str, float]]) -> None:
+        """Record a failed attempt for (key, nextAttempt) entries."""
+
+        with self.db:
+            self.db.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, nextAttempt = ? WHERE key = ?",
+                [(nextAttempt, key) for key, nextAttempt in retries],
+            )
+
+    def OutboxDepth(self: Any) -> int:
+        """Return the number of notifications not delivered yet."""
+
+        return self.db.execute(
+            "SELECT COUNT(*) FROM outbox WHERE delivered IS NULL"
+        ).fetchone()[0]
+
+    def OutboxPrune(self: Any, before: float) -> int:
+        """Delete notifications delivered before a timestamp, return how many."""
+
+        with self.db:
+            return self.db.execute(
+                "DELETE FROM outbox WHERE delivered IS NOT NULL AND delivered < ?",
+                (before,),
+            ).rowcount
+
+    def Migrate(self: Any, paths: Iterable[str] = LEGACY_PATHS) -> int:
+        """
+        Import title versions from legacy history.json files, once.
+
+        When the files disagree about a title, the highest version wins.
+        """
+
+        if self.db.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+            return 0
+
+        found: Dict[Tuple[str, str], Tuple[str, Optional[Dict[str, str]]]] = {}
+
+        for path in dict.fromkeys(os.path.abspath(path) for path in paths):
+            try:
+                with open(path, "r") as file:
+                    legacy: Dict[str, Any] = json.loads(file.read())
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.warning(f"Failed to read legacy title history {path}, {e}")
+
+                continue
+
+            validators: Dict[str, Any] = legacy.get("validators") or {}
+
+            for platform in PLATFORMS:
+                for titleId, version in (legacy.get(platform) or {}).items():
+                    key: Tuple[str, str] = (platform, titleId)
+                    known = found.get(key)
+
+                    if known is None or HistoryStore._VersionKey(
+                        version
+                    ) > HistoryStore._VersionKey(known[0]):
+                        found[key] = (
+                            version,
+                            (validators.get(platform) or {}).get(titleId),
+                        )
+
+            logger.warning(f"Imported legacy title history {path}")
+
+        # Titles already in the store are never overwritten by legacy data
+        existing = set(self.db.execute("SELECT platform, titleId FROM titles"))
+
+        count: int = self.Save(
+            (platform, titleId, version, validators)
+            for (platform, titleId), (version, validators) in found.items()
+            if (platform, titleId) not in existing
+        )
+
+        with self.db:
+            self.db.execute("INSERT INTO meta (key, value) VALUES ('migrated', ?)", (str(time()),))
+
+        return count
+
+    def Close(self: Any) -> None:
+        self.db.close()
+
+    @staticmethod
+    def _Validators(
+        etag: Optional[str], lastModified: Optional[str]
+    ) -> Dict[str, str]:
+        validators: Dict[str, str] = {}
+
+        if etag:
+            validators["etag"] = etag
+
+        if lastModified:
+            validators["lastModified"] = lastModified
+
+        return validators
+
+    @staticmethod
+    def _VersionKey(version: str) -> Tuple[int, ...]:
+        """Order version strings such as 01.09 or 1.2.3 numerically."""
+
+        return tuple(int(part) for part in re.findall(r"\d+", str(version)))
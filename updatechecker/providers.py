@@ -0,0 +1,253 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import logging
+
+from updatechecker.utils import Utility
+
+logger = logging.getLogger(__name__)
+
+# Result of a single title lookup: HTTP status (304 when unchanged), title
+# information and the validators to send with the next lookup
+Result = Tuple[int, Optional[Dict[str, Any]], Dict[str, str]]
+
+
+class Provider:
+    """
+    Source of current title versions for one platform.
+
+    Providers that can look up several titles with a single upstream
+    request set batchSize above 1; Renovate then groups titles into chunks
+    of that size. Single title providers may use conditional requests.
+    """
+
+    platform: str = ""
+    name: str = ""
+    color: str = "000000"
+    logo: Optional[str] = None
+    base: str = ""
+
+    # Maximum number of titles per upstream request
+    batchSize: int = 1
+
+    def __init__(self: Any, base: Optional[str] = None) -> None:
+        if base is not None:
+            self.base = base.rstrip("/")
+
+    async def Lookup(
+        self: Any, titleIds: List[str], validators: Dict[str, Dict[str, str]]
+    ) -> Dict[str, Optional[Result]]:
+        """
+        Return the lookup result of every title, None for failed lookups.
+        validators holds the previous validators of each title.
+        """
+
+        raise NotImplementedError
+
+    def Url(self: Any, titleId: str) -> str:
+        """Return the public page of a title."""
+
+        return f"{self.base}/{titleId}"
+
+
+class OrbisProvider(Provider):
+    """PlayStation 4 titles, via orbispatches.com"""
+
+    platform = "orbis"
+    name = "Orbis"
+    color = "00439C"
+    logo = "https://i.imgur.com/ccNqLcb.png"
+    base = "https://orbispatches.com"
+
+    async def Lookup(
+        self: Any, titleIds: List[str], validators: Dict[str, Dict[str, str]]
+    ) -> Dict[str, Optional[Result]]:
+        results: Dict[str, Optional[Result]] = {}
+
+        for titleId in titleIds:
+            results[titleId] = await self._Lookup(titleId, validators.get(titleId))
+
+        return results
+
+    async def _Lookup(
+        self: Any, titleId: str, validators: Optional[Dict[str, str]]
+    ) -> Optional[Result]:
+        result = await Utility.GETConditional(
+            Utility, f"{self.base}/api/lookup?titleid={titleId}", validators
+        )
+
+        if result is None or result[0] == 304:
+            return result
+
+        status, data, fresh = result
+
+        if (data is None) or (not data.get("success")):
+            return
+
+        return (
+            status,
+            {
+                "name": data["metadata"]["name"],
+                "version": data["metadata"]["currentVersion"],
+                "region": data["metadata"].get("region"),
+                "thumbnail": data["metadata"].get("icon"),
+            },
+            fresh,
+        )
+
+
+class ProsperoProvider(OrbisProvider):
+    """PlayStation 5 titles, via prosperopatches.com"""
+
+    platform = "prospero"
+    name = "Prospero"
+    color = "FFFFFF"
+    logo = "https://prosperopatches.com/favicon.ico"
+    base = "https://prosperopatches.com"
+
+
+class SteamProvider(Provider):
+    """Steam titles, via the public build information of api.steamcmd.net"""
+
+    platform = "steam"
+    name = "Steam"
+    color = "1B2838"
+    logo = "https://store.steampowered.com/favicon.ico"
+    base = "https://api.steamcmd.net"
+
+    async def Lookup(
+        self: Any, titleIds: List[str], validators: Dict[str, Dict[str, str]]
+    ) -> Dict[str, Optional[Result]]:
+        results: Dict[str, Optional[Result]] = {}
+
+        for appId in titleIds:
+            results[appId] = await self._Lookup(appId, validators.get(appId))
+
+        return results
+
+    async def _Lookup(
+        self: Any, appId: str, validators: Optional[Dict[str, str]]
+    ) -> Optional[Result]:
+        result = await Utility.GETConditional(
+            Utility, f"{self.base}/v1/info/{appId}", validators
+        )
+
+        if result is None or result[0] == 304:
+            return result
+
+        status, data, fresh = result
+
+        try:
+            app: Dict[str, Any] = data["data"][appId]
+            name: str = app["common"]["name"]
+            build: str = app["depots"]["branches"]["public"]["buildid"]
+        except (KeyError, TypeError) as e:
+            logger.warning(f"Unexpected Steam response for {appId}, {e}")
+
+            return
+
+        return (
+            status,
+            {
+                "name": name,
+                "version": str(build),
+                "region": None,
+                "thumbnail": None,
+            },
+            fresh,
+        )
+
+    def Url(self: Any, titleId: str) -> str:
+        return f"https://steamdb.info/app/{titleId}/"
+
+
+class BattleProvider(Provider):
+    """Battle.net titles, via the public version manifest of the patch server"""
+
+    platform = "battle"
+    name = "Battle.net"
+    color = "148EFF"
+    base = "http://us.patch.battle.net:1119"
+
+    # Region whose version is reported
+    region: str = "us"
+
+    async def Lookup(
+        self: Any, titleIds: List[str], validators: Dict[str, Dict[str, str]]
+    ) -> Dict[str, Optional[Result]]:
+        results: Dict[str, Optional[Result]] = {}
+
+        for product in titleIds:
+            results[product] = await self._Lookup(product)
+
+        return results
+
+    async def _Lookup(self: Any, product: str) -> Optional[Result]:
+        data: Optional[str] = await Utility.GET(
+            Utility, f"{self.base}/{product}/versions", raw=True
+        )
+
+        if data is None:
+            return
+
+        # Pipe separated table, the header names each column as Name!TYPE:size
+        rows: List[List[str]] = [
+            line.split("|")
+            for line in data.splitlines()
+            if line.strip() and not line.startswith("#")
+        ]
+
+        if len(rows) < 2:
+            return
+
+        columns: List[str] = [column.split("!")[0] for column in rows[0]]
+
+        try:
+            regionColumn: int = columns.index("Region")
+            versionColumn: int = columns.index("VersionsName")
+        except ValueError:
+            logger.warning(f"Unexpected Battle.net manifest for {product}")
+
+            return
+
+        entries: List[List[str]] = [row for row in rows[1:] if len(row) == len(columns)]
+        match: List[List[str]] = [
+            row for row in entries if row[regionColumn] == self.region
+        ]
+
+        if not (match or entries):
+            return
+
+        row: List[str] = (match or entries)[0]
+
+        return (
+            200,
+            {
+                "name": product,
+                "version": row[versionColumn],
+                "region": row[regionColumn].upper(),
+                "thumbnail": None,
+            },
+            {},
+        )
+
+    def Url(self: Any, titleId: str) -> str:
+        # The manifest itself is a pipe separated table, BlizzTrack shows
+        # the same versions per region as a page
+        return f"https://blizztrack.com/view/{titleId}?type=versions"
+
+
+PROVIDERS: Dict[str, type] = {
+    provider.platform: provider
+    for provider in [OrbisProvider, ProsperoProvider, SteamProvider, BattleProvider]
+}
+
+
+def Providers(endpoints: Optional[Dict[str, str]] = None) -> Dict[str, Provider]:
+    """Create one provider per platform, with optional base URL overrides."""
+
+    endpoints = endpoints or {}
+
+    return {
+        platform: provider(endpoints.get(platform))
+        for platform, provider in PROVIDERS.items()
+    }
@@ -1,218 +1,767 @@
+import asyncio
 import json
+from collections import Counter
 from datetime import datetime
-from sys import exit, stderr
-from typing import Any, Dict, Optional
+from time import monotonic, time
+import random
+from sys import exit
+from typing import Any, Dict, List, Optional, Set, Tuple
 import os
 
 import logging
-from updatechecker.utils import Utility
+from updatechecker.client import pool
+from updatechecker.history import DEFAULT_PATH, HistoryStore
+from updatechecker.providers import Provider, Providers, Result
+from updatechecker.scheduler import Scheduler
+from updatechecker.webhook import dispatcher
 
 logger = logging.getLogger(__name__)
 
+# Number of titles that may be checked at the same time
+DEFAULT_CONCURRENCY: int = 4
+
+# Delivery of the notification outbox, overridable via config "outbox"
+OUTBOX_DEFAULTS: Dict[str, Any] = {
+    # Seconds before the first retry of a failed delivery, doubled with
+    # every further attempt up to maxRetryDelay
+    "retryDelay": 30.0,
+    "maxRetryDelay": 3600.0,
+    # Notifications submitted per delivery pass
+    "batch": 50,
+    # Days delivered notifications are kept for inspection
+    "keepDays": 30,
+}
+
+
 class Renovate:
     """
     Renovate is a Battle.net, PlayStation, and Steam title watcher that
     reports updates via Discord.
 
+    Subscribers each name a webhook and the titles they watch. Every title
+    is looked up once per check, however many subscribers watch it, and
+    each subscriber is notified of the versions it has not seen yet.
+
+    Detection and delivery are decoupled: a change is written to a durable
+    outbox together with the new title version, and Deliver drains the
+    outbox with retries, independently of the update cycles.
+
+    A single long-lived instance keeps its configuration and title history
+    in memory between update cycles. The configuration is only re-read when
+    config.json changes on disk, and changed titles are written back to the
+    history store at the end of each cycle.
+
     https://github.com/EthanC/Renovate
     """
 
-    def Initialize(self: Any) -> None:
-        """Initialize Renovate and begin primary functionality."""
-        logger.info("Renovate")
-        logger.info("https://github.com/EthanC/Renovate")
+    def __init__(self: Any, configPath: Optional[str] = None) -> None:
+        self.configPath: str = configPath or os.path.join(
+            os.path.dirname(__file__), "config.json"
+        )
+        self.configSignature: Optional[Tuple[int, int, int]] = None
+        self.config: Optional[Dict[str, Any]] = None
+
+        self.store: Optional[HistoryStore] = None
+        self.history: Optional[Dict[str, Any]] = None
+
+        # (platform, titleId) pairs changed since the last flush
+        self.dirty: Set[Tuple[str, str]] = set()
+
+        # Subscribers by name and the subscribers of each (platform, titleId)
+        self.subscribers: Dict[str, Dict[str, Any]] = {}
+        self.watchers: Dict[Tuple[str, str], List[str]] = {}
+
+        # (subscriber, platform, titleId) whose seen version changed since
+        # the last flush
+        self.seenDirty: Set[Tuple[str, str, str]] = set()
+
+        # Notifications detected since the last flush, written to the
+        # outbox together with the versions that caused them
+        self.outbox: List[Dict[str, Any]] = []
+
+        # Version transitions detected since the last flush, queried through
+        # updatechecker.timeline.TimelineReader
+        self.transitions: List[Tuple[str, str, str, Optional[str], float]] = []
+
+        # Delivery passes may overlap update cycles but not each other
+        self.deliveryLock: asyncio.Lock = asyncio.Lock()
+        self.delivered: int = 0
+        self.deliveryFailures: int = 0
+
+        # Serializes update cycles and reloads that touch the shared state
+        self.lock: asyncio.Lock = asyncio.Lock()
+
+        # Decides which titles are due in each cycle
+        self.scheduler: Scheduler = Scheduler()
+
+        # Counters read by the metrics exporter
+        self.cycles: int = 0
+        self.cycleSeconds: float = 0.0
+        self.lastCycleSeconds: Optional[float] = None
+        self.outcomes: Counter = Counter()
+
+        # Identifies the log records of the running cycle
+        self.cycleId: int = 0
+        self.cycleOutcomes: Counter = Counter()
+
+    async def Initialize(self: Any) -> None:
+        """Run one update cycle over the titles that are due for a check."""
+
+        async with self.lock:
+            self.ReloadConfig()
+
+            if self.config is None:
+                logger.warning("No configuration loaded, skipping update cycle")
+
+                return
+
+            if self.history is None:
+                self.history = self.LoadHistory()
+
+                if self.history is None:
+                    logger.warning("No title history loaded, skipping update cycle")
+
+                    return
+
+            # Each distinct title is scheduled once for all its subscribers
+            self.scheduler.Sync(
+                (platform, titleId)
+                for platform, titleId in self.watchers
+                if platform in self.providers
+            )
+
+            due: Dict[str, List[str]] = {}
+
+            for platform, titleId in self.scheduler.Due():
+                due.setdefault(platform, []).append(titleId)
+
+            if not due:
+                return
+
+            start: float = monotonic()
+
+            self.cycleId += 1
+            self.cycleOutcomes = Counter()
+
+            # Titles are grouped into as few upstream requests as each
+            # platform's provider allows
+            batches: List[Tuple[Provider, List[str]]] = []
+
+            for platform, titleIds in due.items():
+                provider: Provider = self.providers[platform]
+
+                for i in range(0, len(titleIds), provider.batchSize):
+                    batches.append((provider, titleIds[i : i + provider.batchSize]))
+
+            results = await asyncio.gather(
+                *(self.ProcessTitles(provider, titleIds) for provider, titleIds in batches),
+                return_exceptions=True,
+            )
+
+            for (provider, titleIds), result in zip(batches, results):
+                if isinstance(result, Exception):
+                    logger.error(
+                        f"Failed to process {provider.name} titles {titleIds}, {result}",
+                        extra={"cycle": self.cycleId, "platform": provider.platform},
+                    )
+
+            self.SaveHistory()
+
+            self.lastCycleSeconds = monotonic() - start
+            self.cycleSeconds += self.lastCycleSeconds
+            self.cycles += 1
+
+            # One summary per cycle replaces the per-title steady-state messages
+            logger.info(
+                f"Cycle {self.cycleId} checked {sum(self.cycleOutcomes.values())} titles "
+                f"in {self.lastCycleSeconds:.2f}s",
+                extra={
+                    "cycle": self.cycleId,
+                    "seconds": round(self.lastCycleSeconds, 3),
+                    "outcomes": dict(self.cycleOutcomes),
+                    "http": pool.Stats(),
+                },
+            )
+
+    async def Reload(self: Any) -> bool:
+        """Force a reload of the configuration and title history."""
+
+        async with self.lock:
+            if not self.ReloadConfig(force=True):
+                return False
+
+            self.SaveHistory()
+
+            # Unsaved changes would be lost by reloading from the store
+            if not self.dirty and not self.seenDirty and not self.outbox:
+                self.history = self.LoadHistory()
+
+        return True
+
+    async def Resync(self: Any) -> None:
+        """
+        Replace the in-memory history with the store's, after another
+        process ran the update cycles. Detection then continues from the
+        versions and notifications that process recorded.
+        """
+
+        async with self.lock:
+            if self.history is None:
+                return
+
+            pending: int = len(self.dirty) + len(self.seenDirty) + len(self.outbox)
+
+            if pending:
+                logger.warning(f"Discarding {pending} unsaved changes of an earlier term")
+
+            self.dirty.clear()
+            self.seenDirty.clear()
+            self.outbox.clear()
+            self.transitions.clear()
+
+            # Never fall back to the stale history, Initialize retries
+            self.history = None
+            self.history = self.LoadHistory()
+
+    async def Close(self: Any) -> None:
+        """Save the pending history and close the history store."""
+
+        async with self.lock:
+            if self.store is None:
+                return
+
+            self.SaveHistory()
+            self.store.Close()
+
+            self.store = None
+            self.history = None
+
+    def ExportState(self: Any) -> Dict[str, Any]:
+        """Return the polling state worth keeping across restarts."""
+
+        return {"schedule": self.scheduler.Export()}
+
+    def RestoreState(self: Any, state: Optional[Dict[str, Any]]) -> None:
+        """Resume polling where a previous process stopped."""
+
+        if not state:
+            return
+
+        restored: int = self.scheduler.Restore(state.get("schedule", []))
+
+        logger.info(f"Restored the schedule of {restored} titles")
+
+    def Stats(self: Any) -> Dict[str, Dict[str, Any]]:
+        """Return the polling statistics of every tracked title, keyed platform/titleId."""
+
+        return {
+            f"{platform}/{titleId}": stats
+            for (platform, titleId), stats in self.scheduler.Stats().items()
+        }
+
+    def ReloadConfig(self: Any, force: bool = False) -> bool:
+        """
+        Load config.json if its stat signature changed since the last load,
+        returning whether it was (re)loaded.
+        """
+
+        try:
+            stat: os.stat_result = os.stat(self.configPath)
+            signature: Tuple[int, int, int] = (
+                stat.st_mtime_ns,
+                stat.st_size,
+                stat.st_ino,
+            )
+        except OSError:
+            signature = None
+
+        if not force and self.config is not None and signature == self.configSignature:
+            return False
+
+        config: Optional[Dict[str, Any]] = self.LoadConfig()
+
+        if config is None:
+            return False
+
+        self.config = config
+        self.configSignature = signature
+
+        pool.Configure(self.config.get("http"))
+
+        self.providers: Dict[str, Provider] = Providers(self.config.get("endpoints"))
+        self.scheduler.Configure(self.config.get("schedule"))
+
+        self.subscribers = Renovate.Subscriptions(self.config)
+        self.watchers = {}
+
+        for name, subscriber in self.subscribers.items():
+            for platform, titleIds in subscriber["titles"].items():
+                for titleId in titleIds:
+                    self.watchers.setdefault((platform, titleId), []).append(name)
+
+        for platform in {platform for platform, _ in self.watchers}:
+            if platform not in self.providers:
+                logger.warning(f"Unknown platform {platform}, skipping its titles")
+
+        # Titles are checked concurrently, bounded so that a long title list
+        # does not open an unbounded number of upstream requests at once.
+        self.limit: asyncio.Semaphore = asyncio.Semaphore(
+            self.config.get("concurrency", DEFAULT_CONCURRENCY)
+        )
+
+        return True
+
+    @staticmethod
+    def Subscriptions(config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the subscribers of the configuration by name.
+
+        "subscriptions" lists {name, webhookUrl, username, titles} entries;
+        without it, the top-level "discord" webhook subscribes to "titles".
+        """
 
-        self.config: Dict[str, Any] = Renovate.LoadConfig(self)
+        discord: Dict[str, Any] = config.get("discord") or {}
+        entries: Optional[List[Dict[str, Any]]] = config.get("subscriptions")
 
-        self.history: Dict[str, Any] = Renovate.LoadHistory(self)
-        self.changed: bool = False
+        if entries is None:
+            entries = [{"name": "default", **discord, "titles": config.get("titles", {})}]
 
-        # PlayStation 4
-        for title in self.config["titles"]["orbis"]:
-            Renovate.ProcessOrbisTitle(self, title)
+        subscribers: Dict[str, Dict[str, Any]] = {}
 
-        if self.changed:
-            Renovate.SaveHistory(self)
+        for entry in entries:
+            name: Optional[str] = entry.get("name")
 
-        logger.warning("Finished processing titles")
+            if not name or not entry.get("webhookUrl"):
+                logger.warning(f"Subscription {name} has no name or webhookUrl, skipping it")
 
-    def LoadConfig(self: Any) -> Dict[str, Any]:
+                continue
+
+            subscribers[name] = {
+                "webhookUrl": entry["webhookUrl"],
+                "username": entry.get("username", discord.get("username")),
+                "titles": entry.get("titles", {}),
+            }
+
+        return subscribers
+
+    def LoadConfig(self: Any) -> Optional[Dict[str, Any]]:
         """Load the configuration values specified in config.json"""
-        dir = os.path.dirname(__file__)
-        file = "config.json"
-        path = os.path.join(dir, file)
+
         try:
-            with open(path, "r") as file:
+            with open(self.configPath, "r") as file:
                 config: Dict[str, Any] = json.loads(file.read())
         except Exception as e:
+            # Keep running with the previous configuration, if any
             logger.warning(f"Failed to load configuration, {e}")
 
-            exit(1)
+            return
 
         logger.warning("Loaded configuration")
 
         return config
 
-    def LoadHistory(self: Any) -> Dict[str, Any]:
-        """Load the last seen title versions specified in history.json"""
+    def LoadHistory(self: Any) -> Optional[Dict[str, Any]]:
+        """
+        Load the last seen title versions from the title history store. On
+        failure the error is logged and the previous history, if any, is
+        returned, so the caller keeps its state and may try again later.
+        """
 
         try:
-            with open("history.json", "r") as file:
-                history: Dict[str, Any] = json.loads(file.read())
-        except FileNotFoundError:
-            history: Dict[str, Any] = {
-                "battle": {},
-                "prospero": {},
-                "orbis": {},
-                "steam": {},
-            }
-
-            with open("history.json", "w+") as file:
-                file.write(json.dumps(history, indent=4))
+            if self.store is None:
+                store: HistoryStore = HistoryStore(
+                    self.config.get("historyPath", DEFAULT_PATH)
+                )
 
-            logger.warning("Title history not found, created empty file")
-        except Exception as e:
-            logger.warning(f"Failed to load title history, {e}")
+                migrated: int = store.Migrate()
 
-            exit(1)
+                if migrated > 0:
+                    logger.warning(f"Migrated {migrated} titles from history.json")
 
-        if history.get("battle") is None:
-            history["battle"] = {}
+                keepDays: float = {**OUTBOX_DEFAULTS, **self.config.get("outbox", {})}[
+                    "keepDays"
+                ]
+                store.OutboxPrune(time() - keepDays * 86400)
+                store.SeedTimeline()
 
-        if history.get("prospero") is None:
-            history["prospero"] = {}
+                self.store = store
 
-        if history.get("orbis") is None:
-            history["orbis"] = {}
+            history: Dict[str, Any] = self.store.Load()
+        except Exception as e:
+            logger.error(f"Failed to load title history, {e}")
 
-        if history.get("steam") is None:
-            history["steam"] = {}
+            return self.history
 
         logger.warning("Loaded title history")
 
         return history
 
-    def ProcessOrbisTitle(self: Any, titleId: str) -> None:
+    async def ProcessTitles(self: Any, provider: Provider, titleIds: List[str]) -> None:
         """
-        Get the current version of the specified PlayStation 4 title and
-        determine whether or not it has updated.
+        Get the current versions of the specified titles and determine
+        whether or not they have updated.
         """
 
-        past: Optional[str] = self.history["orbis"].get(titleId)
+        validators: Dict[str, Dict[str, str]] = {}
+
+        for titleId in titleIds:
+            # Without a known version the full response is needed
+            if self.history[provider.platform].get(titleId) is not None:
+                validators[titleId] = self.history["validators"][provider.platform].get(
+                    titleId
+                )
 
-        data: Optional[Dict[str, Any]] = Utility.GET(
-            self, f"https://orbispatches.com/api/lookup?titleid={titleId}"
+        outcomes: Dict[str, str] = {}
+
+        try:
+            # Only the lookup is bounded, waiting on a notification must not
+            # hold a slot that other titles need for their lookups
+            async with self.limit:
+                results: Dict[str, Optional[Result]] = await provider.Lookup(
+                    titleIds, validators
+                )
+
+            outcomes = dict(
+                zip(
+                    titleIds,
+                    await asyncio.gather(
+                        *(
+                            self.ProcessTitle(provider, titleId, results.get(titleId))
+                            for titleId in titleIds
+                        )
+                    ),
+                )
+            )
+        finally:
+            # Every checked title is scheduled again, even if its lookup raised
+            for titleId in titleIds:
+                outcome: str = outcomes.get(titleId, "failed")
+
+                self.outcomes[(provider.platform, titleId, outcome)] += 1
+                self.cycleOutcomes[outcome] += 1
+                self.scheduler.Record((provider.platform, titleId), outcome)
+
+    async def ProcessTitle(
+        self: Any, provider: Provider, titleId: str, result: Optional[Result]
+    ) -> str:
+        """
+        Compare a title lookup result with the title history, notify the
+        subscribers that have not seen the current version and return the
+        outcome.
+        """
+
+        platform: str = provider.platform
+        past: Optional[str] = self.history[platform].get(titleId)
+        validators: Optional[Dict[str, str]] = self.history["validators"][platform].get(
+            titleId
         )
 
-        if (data is None) or (not data.get("success")):
-            return
+        fields: Dict[str, Any] = {
+            "cycle": self.cycleId,
+            "platform": platform,
+            "titleId": titleId,
+        }
+
+        if result is None:
+            return "failed"
+
+        status, info, fresh = result
+
+        if status == 304:
+            logger.debug(
+                f"{provider.name} title {titleId} not modified ({past})",
+                extra={**fields, "outcome": "notModified", "sample": (platform, titleId)},
+            )
 
-        name: str = data["metadata"]["name"]
-        current: str = data["metadata"]["currentVersion"]
+            return "notModified"
+
+        name: str = info["name"]
+        current: str = info["version"]
 
         if past is None:
-            self.history["orbis"][titleId] = current
-            self.changed = True
+            self.history[platform][titleId] = current
+            self.history["validators"][platform][titleId] = fresh
+            self.dirty.add((platform, titleId))
+
+            for subscriber in self.watchers.get((platform, titleId), []):
+                self.See(subscriber, platform, titleId, current)
+
+            self.transitions.append((platform, titleId, current, None, time()))
+
+            logger.info(
+                f"{provider.name} title {name} previously untracked, saved version {current} to title history",
+                extra={**fields, "outcome": "untracked", "version": current},
+            )
+
+            return "untracked"
+
+        # (subscriber, version it was last notified about)
+        pending: List[Tuple[str, str]] = []
+
+        for subscriber in self.watchers.get((platform, titleId), []):
+            seen: Optional[str] = self.Seen(subscriber, platform, titleId)
+
+            if seen is None:
+                # New subscribers start from the version known when they
+                # subscribed
+                seen = past
+                self.See(subscriber, platform, titleId, seen)
+
+            if seen != current:
+                pending.append((subscriber, seen))
 
+        if past == current and not pending:
+            logger.debug(
+                f"{provider.name} title {name} not updated ({current})",
+                extra={**fields, "outcome": "unchanged", "sample": (platform, titleId)},
+            )
+
+            if fresh != validators:
+                self.history["validators"][platform][titleId] = fresh
+                self.dirty.add((platform, titleId))
+
+            return "unchanged"
+
+        if pending:
             logger.warning(
-                f"Orbis title {name} previously untracked, saved version {current} to title history"
+                f"{provider.name} title {name} updated, {past} -> {current}, "
+                f"queueing notifications for {len(pending)} subscribers",
+                extra={**fields, "outcome": "updated", "pastVersion": past, "version": current},
             )
 
-            return
-        elif past == current:
-            logger.warning(f"Orbis title {name} not updated ({current})")
+        data: Dict[str, Any] = {
+            "name": name,
+            "url": provider.Url(titleId),
+            "platformColor": provider.color,
+            "region": info.get("region"),
+            "titleId": titleId,
+            "platformLogo": provider.logo,
+            "thumbnail": info.get("thumbnail"),
+            "image": None,
+            "currentVersion": f"`{current}`",
+        }
 
-            return
+        for subscriber, seen in pending:
+            settings: Dict[str, Any] = self.subscribers[subscriber]
 
-        logger.warning(f"Orbis title {name} updated, {past} -> {current}")
-
-        success: bool = Renovate.Notify(
-
-            self,
-            {
-                "name": name,
-                "url": f"https://orbispatches.com/{titleId}",
-                "platformColor": "00439C",
-                "region": data["metadata"]["region"],
-                "titleId": titleId,
-                "platformLogo": "https://i.imgur.com/ccNqLcb.png",
-                "thumbnail": data["metadata"]["icon"],
-                "image": None,
-                "pastVersion": f"`{past}`",
-                "currentVersion": f"`{current}`",
-            },
-        )
+            self.outbox.append(
+                {
+                    # The same change is never enqueued twice for a subscriber
+                    "key": f"{subscriber}:{platform}:{titleId}:{current}",
+                    "subscriber": subscriber,
+                    "platform": platform,
+                    "titleId": titleId,
+                    "version": current,
+                    "webhookUrl": settings["webhookUrl"],
+                    "username": settings["username"],
+                    "embed": self.Embed({**data, "pastVersion": f"`{seen}`"}),
+                }
+            )
+            self.See(subscriber, platform, titleId, current)
+
+        if past != current:
+            self.transitions.append((platform, titleId, current, past, time()))
+
+        # Every subscriber has the change in its outbox, delivery no longer
+        # depends on this title being looked up again
+        self.history[platform][titleId] = current
+        self.history["validators"][platform][titleId] = fresh
+        self.dirty.add((platform, titleId))
+
+        return "updated"
+
+    def Seen(self: Any, subscriber: str, platform: str, titleId: str) -> Optional[str]:
+        """Return the version a subscriber was last notified about."""
 
-        # Ensure no changes go without notification
-        if success:
-            self.history["orbis"][titleId] = current
-            self.changed = True
+        return self.history["seen"].get(subscriber, {}).get(platform, {}).get(titleId)
 
-    def Notify(self: Any, data: Dict[str, str]) -> bool:
-        """Report title version change to the configured Discord webhook."""
+    def See(self: Any, subscriber: str, platform: str, titleId: str, version: str) -> None:
+        self.history["seen"].setdefault(subscriber, {}).setdefault(platform, {})[
+            titleId
+        ] = version
+        self.seenDirty.add((subscriber, platform, titleId))
 
-        settings: Dict[str, Any] = self.config["discord"]
+    def Embed(self: Any, data: Dict[str, str]) -> Dict[str, Any]:
+        """Build the Discord embed reporting a title version change."""
 
         region: Optional[str] = data.get("region")
         titleId: str = data["titleId"]
 
-        payload: Dict[str, Any] = {
-            "username": settings["username"],
-            "embeds": [
+        embed: Dict[str, Any] = {
+            "title": data["name"],
+            "description": "Es gibt ein Update zu F1 22!",
+            "url": data.get("url"),
+            "timestamp": datetime.utcnow().isoformat(),
+            "color": int(data["platformColor"], base=16),
+            "footer": {
+                "text": titleId if region is None else f"({region}) {titleId}",
+                "icon_url": data["platformLogo"],
+            },
+            "thumbnail": {"url": data.get("thumbnail")},
+            "image": {"url": data.get("image")},
+            "author": {
+                "name": "F1O PS Bot"
+            },
+            "fields": [
                 {
-                    "title": data["name"],
-                    "description": "Es gibt ein Update zu F1 22!",
-                    "url": data.get("url"),
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "color": int(data["platformColor"], base=16),
-                    "footer": {
-                        "text": titleId if region is None else f"({region}) {titleId}",
-                        "icon_url": data["platformLogo"],
-                    },
-                    "thumbnail": {"url": data.get("thumbnail")},
-                    "image": {"url": data.get("image")},
-                    "author": {
-                        "name": "F1O PS Bot"
-                    },
-                    "fields": [
-                        {
-                            "name": "Letzte Version",
-                            "value": data["pastVersion"],
-                            "inline": True,
-                        },
-                        {
-                            "name": "Neue Version",
-                            "value": data["currentVersion"],
-                            "inline": True,
-                        },
-                    ],
-                }
+                    "name": "Letzte Version",
+                    "value": data["pastVersion"],
+                    "inline": True,
+                },
+                {
+                    "name": "Neue Version",
+                    "value": data["currentVersion"],
+                    "inline": True,
+                },
             ],
         }
 
-        return Utility.POST(self, settings["webhookUrl"], payload)
+        return embed
 
-    def SaveHistory(self: Any) -> None:
-        """Save the latest title versions to history.json"""
+    async def Deliver(self: Any) -> int:
+        """
+        Submit the outbox notifications that are due and return how many
+        were delivered.
 
-        if self.config.get("debug"):
-            logger.warning("Debug is active, not saving title history")
+        Delivery is at least once: a notification stays in the outbox until
+        its webhook accepted it, failed attempts are retried with
+        exponential backoff.
+        """
+
+        if self.store is None:
+            return 0
+
+        settings: Dict[str, Any] = {**OUTBOX_DEFAULTS, **(self.config or {}).get("outbox", {})}
+
+        async with self.deliveryLock:
+            try:
+                due: List[Dict[str, Any]] = self.store.OutboxDue(time(), settings["batch"])
+            except Exception as e:
+                # E.g. locked during a leader handover, the next pass retries
+                logger.warning(f"Failed to read the notification outbox, {e}")
+
+                return 0
+
+            if not due:
+                return 0
+
+            # Embeds for the same webhook are coalesced into as few messages
+            # as the rate limit allows
+            results: List[bool] = await asyncio.gather(
+                *(
+                    dispatcher.Submit(
+                        notification["webhookUrl"],
+                        notification["username"],
+                        notification["embed"],
+                    )
+                    for notification in due
+                )
+            )
+
+            delivered: List[str] = []
+            retries: List[Tuple[str, float]] = []
+            now: float = time()
+
+            for notification, success in zip(due, results):
+                if success:
+                    delivered.append(notification["key"])
+
+                    continue
+
+                attempts: int = notification["attempts"] + 1
+                delay: float = min(
+                    settings["retryDelay"] * 2 ** (attempts - 1), settings["maxRetryDelay"]
+                )
+
+                retries.append(
+                    (notification["key"], now + delay * random.uniform(0.9, 1.1))
+                )
+
+                logger.warning(
+                    f"Failed to deliver notification {notification['key']} "
+                    f"(attempt {attempts}), retrying in {int(delay)}s",
+                    extra={"key": notification["key"], "attempts": attempts},
+                )
+
+            try:
+                self.store.OutboxDelivered(delivered)
+                self.store.OutboxRetry(retries)
+            except Exception as e:
+                # The rows stay due, delivered ones are sent again (at least once)
+                logger.warning(f"Failed to update the notification outbox, {e}")
+
+            self.delivered += len(delivered)
+            self.deliveryFailures += len(retries)
+
+        if delivered:
+            logger.info(
+                f"Delivered {len(delivered)} notifications",
+                extra={"delivered": len(delivered), "failed": len(retries)},
+            )
+
+        return len(delivered)
+
+    def SaveHistory(self: Any) -> None:
+        """Write the titles changed since the last flush to the title history store"""
 
+        if not self.dirty and not self.seenDirty and not self.outbox and not self.transitions:
             return
 
+        dirty: Set[Tuple[str, str]] = set(self.dirty)
+        seenDirty: Set[Tuple[str, str, str]] = set(self.seenDirty)
+        outbox: List[Dict[str, Any]] = list(self.outbox)
+        transitions: List[Tuple[str, str, str, Optional[str], float]] = list(
+            self.transitions
+        )
+
+        debug: bool = bool(self.config.get("debug"))
+
+        if debug:
+            # Notifications are still sent, the history is left unchanged.
+            # The changes are dropped all the same, as if they were saved.
+            logger.warning("Debug is active, not saving title history")
+
         try:
-            with open("history.json", "w+") as file:
-                file.write(json.dumps(self.history, indent=4))
+            count: int = self.store.Flush(
+                (
+                    (
+                        platform,
+                        titleId,
+                        self.history[platform][titleId],
+                        self.history["validators"][platform].get(titleId),
+                    )
+                    for platform, titleId in ([] if debug else dirty)
+                ),
+                (
+                    (subscriber, platform, titleId, self.Seen(subscriber, platform, titleId))
+                    for subscriber, platform, titleId in ([] if debug else seenDirty)
+                ),
+                outbox,
+                [] if debug else transitions,
+            )
         except Exception as e:
+            # Changes stay dirty and are written with the next flush
             logger.warning(f"Failed to save title history, {e}")
 
-            exit(1)
+            return
 
-        logger.warning("Saved title history")
+        self.dirty -= dirty
+        self.seenDirty -= seenDirty
+        del self.outbox[: len(outbox)]
+        del self.transitions[: len(transitions)]
 
+        logger.info(
+            f"Saved title history ({count} titles)", extra={"cycle": self.cycleId}
+        )
 
 if __name__ == "__main__":
     try:
-        Renovate.Initialize(Renovate)
+        renovate: Renovate = Renovate()
+
+        async def Main() -> None:
+            await renovate.Initialize()
+            await renovate.Deliver()
+
+        asyncio.run(Main())
     except KeyboardInterrupt:
         exit()
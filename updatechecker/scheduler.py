@@ -0,0 +1,289 @@
+import heapq
+import random
+from datetime import datetime, timezone
+from time import time
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Schedule:
+    """Polling state and statistics of a single title."""
+
+    __slots__ = (
+        "interval",
+        "nextCheck",
+        "lastCheck",
+        "lastChange",
+        "checks",
+        "changes",
+        "failures",
+        "averageInterval",
+    )
+
+    def __init__(self: Any, interval: float, nextCheck: float) -> None:
+        self.interval: float = interval
+        self.nextCheck: float = nextCheck
+        self.lastCheck: Optional[float] = None
+        self.lastChange: Optional[float] = None
+        self.checks: int = 0
+        self.changes: int = 0
+        self.failures: int = 0
+        self.averageInterval: Optional[float] = None
+
+
+class Scheduler:
+    """
+    Priority queue of per-title check times.
+
+    Titles that stay unchanged are checked less and less often, up to
+    maxInterval. A change, or a configured patch window, tightens the
+    interval to minInterval. Every interval is jittered so checks spread
+    out instead of arriving in bursts.
+    """
+
+    DEFAULTS: Dict[str, Any] = {
+        "minInterval": 60.0,
+        "baseInterval": 300.0,
+        "maxInterval": 3600.0,
+        "backoff": 1.5,
+        "jitter": 0.1,
+        # [{"weekdays": [0-6, Monday is 0], "start": "HH:MM", "end": "HH:MM"}] in UTC
+        "patchWindows": [],
+    }
+
+    def __init__(self: Any, settings: Optional[Dict[str, Any]] = None) -> None:
+        self.settings: Dict[str, Any] = {}
+        self.titles: Dict[Hashable, Schedule] = {}
+        self.queue: List[Tuple[float, int, Hashable]] = []
+        self.sequence: int = 0
+        # Whether the last Due or NextDue call fell into a patch window
+        self.inWindow: bool = False
+
+        self.Configure(settings)
+
+    def Configure(self: Any, settings: Optional[Dict[str, Any]]) -> None:
+        """Apply scheduler settings, existing titles keep their next check."""
+
+        self.settings = {**Scheduler.DEFAULTS, **(settings or {})}
+
+    def Sync(self: Any, keys: Iterable[Hashable], now: Optional[float] = None) -> None:
+        """Start tracking new titles, due immediately, and forget removed ones."""
+
+        now = time() if now is None else now
+        keys = list(keys)
+
+        for key in set(self.titles) - set(keys):
+            # Queue entries of removed titles are skipped when popped
+            del self.titles[key]
+
+        for key in keys:
+            if key not in self.titles:
+                self.titles[key] = Schedule(self.settings["baseInterval"], now)
+                self._Push(key, now)
+
+    def Export(self: Any) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Return the state of every title as JSON-serializable entries."""
+
+        return [
+            (
+                list(key) if isinstance(key, tuple) else key,
+                {slot: getattr(schedule, slot) for slot in Schedule.__slots__},
+            )
+            for key, schedule in self.titles.items()
+        ]
+
+    def Restore(self: Any, entries: Iterable[Tuple[Any, Dict[str, Any]]]) -> int:
+        """
+        Track exported titles again with their previous next check, so a
+        restart does not make every title due at once. Titles that are
+        already tracked keep their current state.
+        """
+
+        restored: int = 0
+
+        for key, state in entries:
+            key = tuple(key) if isinstance(key, list) else key
+
+            if key in self.titles:
+                continue
+
+            schedule: Schedule = Schedule(state["interval"], state["nextCheck"])
+
+            for slot in Schedule.__slots__:
+                if slot in state:
+                    setattr(schedule, slot, state[slot])
+
+            self.titles[key] = schedule
+            self._Push(key, schedule.nextCheck)
+            restored += 1
+
+        # Restored checks may lie beyond an open patch window
+        self.inWindow = False
+
+        return restored
+
+    def Due(self: Any, now: Optional[float] = None) -> List[Hashable]:
+        """Pop and return every title whose next check time has passed."""
+
+        now = time() if now is None else now
+        due: List[Hashable] = []
+
+        self._EnterWindow(now)
+
+        while self.queue and self.queue[0][0] <= now:
+            when, _, key = heapq.heappop(self.queue)
+            schedule: Optional[Schedule] = self.titles.get(key)
+
+            # Skip entries of removed or rescheduled titles
+            if schedule is None or schedule.nextCheck != when:
+                continue
+
+            due.append(key)
+
+        return due
+
+    def NextDue(self: Any, now: Optional[float] = None) -> Optional[float]:
+        """Return the seconds until the next title is due, if any."""
+
+        now = time() if now is None else now
+
+        self._EnterWindow(now)
+
+        while self.queue:
+            when, _, key = self.queue[0]
+            schedule: Optional[Schedule] = self.titles.get(key)
+
+            if schedule is not None and schedule.nextCheck == when:
+                return max(when - now, 0.0)
+
+            heapq.heappop(self.queue)
+
+        return
+
+    def Record(
+        self: Any, key: Hashable, outcome: str, now: Optional[float] = None
+    ) -> None:
+        """
+        Record the outcome of a title check and schedule the next one.
+
+        outcome is one of: updated, unchanged, notModified, untracked or
+        failed.
+        """
+
+        now = time() if now is None else now
+        schedule: Optional[Schedule] = self.titles.get(key)
+
+        if schedule is None:
+            return
+
+        settings: Dict[str, Any] = self.settings
+
+        if schedule.lastCheck is not None:
+            elapsed: float = now - schedule.lastCheck
+            # Number of intervals already contained in the average
+            count: int = schedule.checks - 1
+            schedule.averageInterval = (
+                elapsed
+                if schedule.averageInterval is None
+                else (schedule.averageInterval * count + elapsed) / (count + 1)
+            )
+
+        schedule.checks += 1
+        schedule.lastCheck = now
+
+        if outcome == "updated":
+            schedule.changes += 1
+            schedule.lastChange = now
+            schedule.interval = settings["minInterval"]
+        elif outcome in ("unchanged", "notModified", "untracked"):
+            schedule.interval = min(
+                schedule.interval * settings["backoff"], settings["maxInterval"]
+            )
+        else:
+            # Failed lookups are retried without backing off further
+            schedule.failures += 1
+
+        interval: float = schedule.interval
+
+        if self.InPatchWindow(now):
+            interval = min(interval, settings["minInterval"])
+
+        schedule.nextCheck = now + self._Jitter(interval)
+        self._Push(key, schedule.nextCheck)
+
+    def _EnterWindow(self: Any, now: float) -> None:
+        """
+        When a patch window opens, pull every check scheduled further
+        ahead back to minInterval, instead of waiting for titles backed off
+        up to maxInterval to be checked once more.
+        """
+
+        inWindow: bool = self.InPatchWindow(now)
+
+        if inWindow and not self.inWindow:
+            latest: float = now + self.settings["minInterval"]
+            pulled: int = 0
+
+            for key, schedule in self.titles.items():
+                if schedule.nextCheck > latest:
+                    schedule.nextCheck = now + self._Jitter(self.settings["minInterval"])
+                    self._Push(key, schedule.nextCheck)
+                    pulled += 1
+
+            if pulled:
+                logger.info(f"Patch window opened, checking {pulled} titles sooner")
+
+        self.inWindow = inWindow
+
+    def _Jitter(self: Any, interval: float) -> float:
+        jitter: float = self.settings["jitter"]
+
+        return max(interval * random.uniform(1 - jitter, 1 + jitter), 1.0)
+
+    def InPatchWindow(self: Any, now: Optional[float] = None) -> bool:
+        """Return whether now falls into one of the configured patch windows."""
+
+        moment: datetime = datetime.fromtimestamp(
+            time() if now is None else now, tz=timezone.utc
+        )
+        clock: str = moment.strftime("%H:%M")
+
+        for window in self.settings["patchWindows"]:
+            weekdays = window.get("weekdays")
+
+            if weekdays is not None and moment.weekday() not in weekdays:
+                continue
+
+            if window.get("start", "00:00") <= clock < window.get("end", "24:00"):
+                return True
+
+        return False
+
+    def Stats(self: Any) -> Dict[Hashable, Dict[str, Any]]:
+        """Return the polling statistics of every tracked title."""
+
+        return {
+            key: {
+                "interval": round(schedule.interval, 1),
+                "nextCheck": schedule.nextCheck,
+                "lastCheck": schedule.lastCheck,
+                "lastChange": schedule.lastChange,
+                "checks": schedule.checks,
+                "changes": schedule.changes,
+                "failures": schedule.failures,
+                "averageInterval": (
+                    None
+                    if schedule.averageInterval is None
+                    else round(schedule.averageInterval, 1)
+                ),
+            }
+            for key, schedule in self.titles.items()
+        }
+
+    def _Push(self: Any, key: Hashable, when: float) -> None:
+        self.sequence += 1
+
+        heapq.heappush(self.queue, (when, self.sequence, key))
@@ -0,0 +1,253 @@
+import heapq
+import json
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import logging
+from updatechecker.history import DEFAULT_PATH, HistoryStore
+
+logger = logging.getLogger(__name__)
+
+
+class Patch:
+    """A single observed version transition of a title."""
+
+    __slots__ = ("platform", "titleId", "version", "previous", "observed")
+
+    def __init__(
+        self: Any,
+        platform: str,
+        titleId: str,
+        version: str,
+        previous: Optional[str],
+        observed: float,
+    ) -> None:
+        self.platform: str = platform
+        self.titleId: str = titleId
+        self.version: str = version
+        self.previous: Optional[str] = previous
+        self.observed: float = observed
+
+
+class Series:
+    """Transitions of one title, ordered by the time they were observed."""
+
+    __slots__ = ("observed", "patches")
+
+    def __init__(self: Any) -> None:
+        # Parallel to patches, searched with bisect
+        self.observed: array = array("d")
+        self.patches: List[Patch] = []
+
+    def Copy(self: Any) -> "Series":
+        series: Series = Series()
+        series.observed = array("d", self.observed)
+        series.patches = list(self.patches)
+
+        return series
+
+    def Add(self: Any, patch: Patch) -> None:
+        if not self.observed or patch.observed >= self.observed[-1]:
+            self.observed.append(patch.observed)
+            self.patches.append(patch)
+
+            return
+
+        index: int = bisect_right(self.observed, patch.observed)
+
+        self.observed.insert(index, patch.observed)
+        self.patches.insert(index, patch)
+
+    def Range(self: Any, start: float, end: float) -> List[Patch]:
+        return self.patches[
+            bisect_left(self.observed, start) : bisect_right(self.observed, end)
+        ]
+
+
+class Timeline:
+    """
+    In-memory index over the timeline table of the title history.
+
+    Rows are loaded incrementally by id, so refreshing before every query
+    costs one indexed lookup when nothing changed. Latest-N queries read
+    the tail of each title's series, range queries bisect it, and version
+    lookups are a dict access.
+    """
+
+    def __init__(self: Any) -> None:
+        self.lastId: int = 0
+        self.series: Dict[Tuple[str, str], Series] = {}
+        # Keyed by Timeline.VersionKey, so 1.08 finds 01.08
+        self.versions: Dict[Any, List[Patch]] = {}
+
+    def Refresh(self: Any, store: Any) -> int:
+        """Load the transitions added to the store since the last refresh."""
+
+        return self.Load(store.TimelineSince(self.lastId))
+
+    def Load(self: Any, rows: List[Tuple[int, str, str, str, Optional[str], float]]) -> int:
+        """Add timeline rows as returned by HistoryStore.TimelineSince."""
+
+        for rowId, platform, titleId, version, previous, observed in rows:
+            self.Add(Patch(platform, titleId, version, previous, observed))
+            self.lastId = max(self.lastId, rowId)
+
+        return len(rows)
+
+    def Copy(self: Any) -> "Timeline":
+        """Return an independent copy, the patches themselves are shared."""
+
+        timeline: Timeline = Timeline()
+        timeline.lastId = self.lastId
+        timeline.series = {key: series.Copy() for key, series in self.series.items()}
+        timeline.versions = {key: list(patches) for key, patches in self.versions.items()}
+
+        return timeline
+
+    def Add(self: Any, patch: Patch) -> None:
+        key: Tuple[str, str] = (patch.platform, patch.titleId)
+        series: Optional[Series] = self.series.get(key)
+
+        if series is None:
+            series = self.series[key] = Series()
+
+        series.Add(patch)
+        self.versions.setdefault(Timeline.VersionKey(patch.version), []).append(patch)
+
+    def _Selected(self: Any, titleIds: Optional[Iterable[str]]) -> List[Series]:
+        if titleIds is None:
+            return list(self.series.values())
+
+        wanted = set(titleIds)
+
+        return [series for (_, titleId), series in self.series.items() if titleId in wanted]
+
+    def Latest(self: Any, n: int, titleIds: Optional[Iterable[str]] = None) -> List[Patch]:
+        """Return the n most recent transitions, newest first."""
+
+        return heapq.nlargest(
+            n,
+            (patch for series in self._Selected(titleIds) for patch in series.patches[-n:]),
+            key=lambda patch: patch.observed,
+        )
+
+    def Range(
+        self: Any, start: float, end: float, titleIds: Optional[Iterable[str]] = None
+    ) -> List[Patch]:
+        """Return the transitions observed between start and end, oldest first."""
+
+        return sorted(
+            (
+                patch
+                for series in self._Selected(titleIds)
+                for patch in series.Range(start, end)
+            ),
+            key=lambda patch: patch.observed,
+        )
+
+    def Find(self: Any, version: str) -> List[Patch]:
+        """Return the transitions to a version, oldest first."""
+
+        return sorted(
+            self.versions.get(Timeline.VersionKey(version), []),
+            key=lambda patch: patch.observed,
+        )
+
+    def Titles(self: Any) -> List[Tuple[str, str]]:
+        return list(self.series)
+
+    def AverageInterval(self: Any, platform: str, titleId: str) -> Optional[float]:
+        """Return the average seconds between two updates of a title."""
+
+        series: Optional[Series] = self.series.get((platform, titleId))
+
+        if series is None:
+            return None
+
+        # Entries without a previous version mark when tracking started
+        updates: List[float] = [
+            patch.observed for patch in series.patches if patch.previous is not None
+        ]
+
+        if len(updates) < 2:
+            return None
+
+        return (updates[-1] - updates[0]) / (len(updates) - 1)
+
+    @staticmethod
+    def VersionKey(version: str) -> Any:
+        """Compare versions by their numbers, ignoring leading zeros."""
+
+        numbers: Tuple[int, ...] = tuple(int(part) for part in re.findall(r"\d+", version))
+
+        return numbers or version
+
+
+class TimelineReader:
+    """
+    Timeline of the history store written by the update checker, opened
+    read-only. Lets any process answer patch queries without creating a
+    Renovate instance, which would load providers and migrate the history.
+
+    Patches may run in a worker thread while the event loop reads the
+    timeline. New rows are added to a copy that then replaces the
+    timeline, so a reader never sees an index that is being changed.
+    """
+
+    def __init__(self: Any, configPath: Optional[str] = None) -> None:
+        self.configPath: str = configPath or os.path.join(
+            os.path.dirname(__file__), "config.json"
+        )
+        self.store: Optional[HistoryStore] = None
+        self.timeline: Timeline = Timeline()
+        self.lock: threading.Lock = threading.Lock()
+
+    def Patches(self: Any) -> Optional[Timeline]:
+        """
+        Return the timeline index, refreshed with the transitions stored
+        since the last call, or None while there is no history store.
+        """
+
+        with self.lock:
+            if self.store is None:
+                path: str = self.HistoryPath()
+
+                if not os.path.exists(path):
+                    return
+
+                try:
+                    self.store = HistoryStore(path, readOnly=True)
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to open title history, {e}")
+
+                    return
+
+            try:
+                rows: List[Tuple[int, str, str, str, Optional[str], float]] = (
+                    self.store.TimelineSince(self.timeline.lastId)
+                )
+
+                if rows:
+                    timeline: Timeline = self.timeline.Copy()
+                    timeline.Load(rows)
+
+                    self.timeline = timeline
+            except sqlite3.Error as e:
+                # Answer from the transitions loaded so far
+                logger.warning(f"Failed to refresh the patch timeline, {e}")
+
+            return self.timeline
+
+    def HistoryPath(self: Any) -> str:
+        """Return the history path configured for the update checker."""
+
+        try:
+            with open(self.configPath, "r") as file:
+                return json.loads(file.read()).get("historyPath", DEFAULT_PATH)
+        except (OSError, ValueError):
+            return DEFAULT_PATH
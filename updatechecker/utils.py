@@ -1,17 +1,24 @@
-import json
-from time import sleep
-from typing import Any, Dict, Optional
+import asyncio
+from typing import Any, Dict, Optional, Tuple
 
-import httpx
 from httpx import HTTPError, Response, TimeoutException
 import logging
 
+from updatechecker.client import pool
+
 logger = logging.getLogger(__name__)
 
+# Seconds to wait before the single retry of a failed GET
+RETRY_DELAY: float = 10.0
+
+# Number of GET requests retried after a failure
+retries: Dict[str, int] = {"GET": 0}
+
+
 class Utility:
     """Utilitarian functions designed for Renovate."""
 
-    def GET(
+    async def GET(
         self: Any, url: str, raw: bool = False, isRetry: bool = False
     ) -> Optional[Dict[str, Any]]:
         """Perform an HTTP GET request and return its response."""
@@ -22,18 +29,20 @@ class Utility:
         status: int = 0
 
         try:
-            res: Response = httpx.get(url, timeout=30.0, follow_redirects=True)
+            res: Response = await pool.Async().get(url)
             status = res.status_code
             data: Dict[str, Any] = res.text
 
             res.raise_for_status()
         except TimeoutException as e:
             if not isRetry:
-                logger.debug(f"GET {url} failed, {e}... Retry in 10s")
+                logger.debug(f"GET {url} failed, {e}... Retry in {RETRY_DELAY:.0f}s")
 
-                sleep(10)
+                retries["GET"] += 1
 
-                return Utility.GET(self, url, raw, True)
+                await asyncio.sleep(RETRY_DELAY)
+
+                return await Utility.GET(self, url, raw, True)
 
             # TimeoutException is common, no need to log as error
             logger.debug(f"GET {url} failed, {e}")
@@ -41,22 +50,28 @@ class Utility:
             return
         except HTTPError as e:
             if not isRetry:
-                logger.debug(f"(HTTP {status}) GET {url} failed, {e}... Retry in 10s")
+                logger.debug(
+                    f"(HTTP {status}) GET {url} failed, {e}... Retry in {RETRY_DELAY:.0f}s"
+                )
+
+                retries["GET"] += 1
 
-                sleep(10)
+                await asyncio.sleep(RETRY_DELAY)
 
-                return Utility.GET(self, url, raw, True)
+                return await Utility.GET(self, url, raw, True)
 
             logger.error(f"(HTTP {status}) GET {url} failed, {e}")
 
             return
         except Exception as e:
             if not isRetry:
-                logger.debug(f"GET {url} failed, {e}... Retry in 10s")
+                logger.debug(f"GET {url} failed, {e}... Retry in {RETRY_DELAY:.0f}s")
+
+                retries["GET"] += 1
 
-                sleep(10)
+                await asyncio.sleep(RETRY_DELAY)
 
-                return Utility.GET(self, url, raw, True)
+                return await Utility.GET(self, url, raw, True)
 
             logger.error(f"GET {url} failed, {e}")
 
@@ -67,21 +82,68 @@ class Utility:
 
         return res.json()
 
-    def POST(self: Any, url: str, payload: Dict[str, Any]) -> bool:
+    async def GETConditional(
+        self: Any,
+        url: str,
+        validators: Optional[Dict[str, str]] = None,
+        isRetry: bool = False,
+    ) -> Optional[Tuple[int, Optional[Dict[str, Any]], Dict[str, str]]]:
+        """
+        Perform a conditional HTTP GET request using the ETag and
+        Last-Modified validators of a previous response.
+
+        Return the status code, the parsed body (None when not modified)
+        and the validators to send next time, or None on failure.
+        """
+
         logger = logging.getLogger(__name__)
-        """Perform an HTTP POST request and return its status."""
+
+        validators = validators or {}
+
+        headers: Dict[str, str] = {}
+
+        if validators.get("etag"):
+            headers["if-none-match"] = validators["etag"]
+
+        if validators.get("lastModified"):
+            headers["if-modified-since"] = validators["lastModified"]
+
+        logger.debug(f"GET {url} (conditional: {bool(headers)})")
 
         try:
-            res: Response = httpx.post(
-                url,
-                data=json.dumps(payload),
-                headers={"content-type": "application/json"},
-            )
-            data: str = res.text
+            res: Response = await pool.Async().get(url, headers=headers)
+
+            if res.status_code == 304:
+                # Nothing changed upstream, skip parsing entirely
+                return 304, None, validators
 
             res.raise_for_status()
+
+            data: Dict[str, Any] = res.json()
         except Exception as e:
-            logger.warning(f"POST {url} failed, {e}")
+            if not isRetry:
+                logger.debug(f"GET {url} failed, {e}... Retry in {RETRY_DELAY:.0f}s")
+
+                retries["GET"] += 1
+
+                await asyncio.sleep(RETRY_DELAY)
+
+                return await Utility.GETConditional(self, url, validators, True)
+
+            if isinstance(e, TimeoutException):
+                # TimeoutException is common, no need to log as error
+                logger.debug(f"GET {url} failed, {e}")
+            else:
+                logger.error(f"GET {url} failed, {e}")
+
+            return
+
+        fresh: Dict[str, str] = {}
+
+        if res.headers.get("etag"):
+            fresh["etag"] = res.headers["etag"]
+
+        if res.headers.get("last-modified"):
+            fresh["lastModified"] = res.headers["last-modified"]
 
-            return False
-        return True
+        return 200, data, fresh
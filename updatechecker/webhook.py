@@ -0,0 +1,267 @@
+import asyncio
+import json
+from time import monotonic
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from httpx import Response
+import logging
+
+from updatechecker.client import pool
+
+logger = logging.getLogger(__name__)
+
+# Discord accepts at most 10 embeds per webhook message, with at most 6000
+# characters of text over all of them
+MAX_EMBEDS: int = 10
+MAX_EMBED_CHARS: int = 6000
+
+
+class Bucket:
+    """Rate limit state of a single Discord webhook."""
+
+    def __init__(self: Any) -> None:
+        self.remaining: Optional[int] = None
+        self.resetAt: float = 0.0
+        self.name: Optional[str] = None
+
+    def Delay(self: Any) -> float:
+        """Return how long to wait before the next request may be sent."""
+
+        if self.remaining is not None and self.remaining <= 0:
+            return max(self.resetAt - monotonic(), 0.0)
+
+        return 0.0
+
+    def Update(self: Any, res: Response) -> None:
+        """Track the X-RateLimit headers of a webhook response."""
+
+        headers = res.headers
+
+        if headers.get("x-ratelimit-bucket"):
+            self.name = headers["x-ratelimit-bucket"]
+
+        if headers.get("x-ratelimit-remaining") is not None:
+            self.remaining = int(headers["x-ratelimit-remaining"])
+
+        if headers.get("x-ratelimit-reset-after") is not None:
+            self.resetAt = monotonic() + float(headers["x-ratelimit-reset-after"])
+
+
+class WebhookDispatcher:
+    """
+    Coalesce Discord webhook embeds into as few messages as possible and
+    deliver them without exceeding the webhook rate limit.
+
+    Every submitted embed resolves to its own delivery result, so callers
+    can still decide per title whether a notification went out.
+    """
+
+    def __init__(
+        self: Any, linger: float = 1.0, maxAttempts: int = 5, backoff: float = 2.0
+    ) -> None:
+        self.linger: float = linger
+        self.maxAttempts: int = maxAttempts
+        self.backoff: float = backoff
+
+        # Keyed by (url, username), every message carries a single username
+        self.queues: Dict[Tuple[str, str], List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self.workers: Dict[Tuple[str, str], asyncio.Task] = {}
+        # Rate limits apply per webhook, whatever the username
+        self.buckets: Dict[str, Bucket] = {}
+
+        self.sent: int = 0
+        self.failed: int = 0
+        self.retries: int = 0
+        self.rateLimited: int = 0
+
+    def Depth(self: Any) -> int:
+        """Return the number of embeds waiting to be delivered."""
+
+        return sum(len(queue) for queue in self.queues.values())
+
+    async def Submit(
+        self: Any, url: str, username: str, embed: Dict[str, Any]
+    ) -> bool:
+        """Queue an embed for the webhook and wait for its delivery result."""
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        key: Tuple[str, str] = (url, username)
+
+        self.queues.setdefault(key, []).append((embed, future))
+
+        worker: Optional[asyncio.Task] = self.workers.get(key)
+
+        if worker is None or worker.done():
+            self.workers[key] = asyncio.create_task(self._Drain(key))
+
+        return await future
+
+    async def _Drain(self: Any, key: Tuple[str, str]) -> None:
+        """Send queued embeds for a webhook and username until the queue is empty."""
+
+        # Give concurrently processed titles a moment to join the batch
+        await asyncio.sleep(self.linger)
+
+        url, username = key
+        queue = self.queues[key]
+
+        while queue:
+            batch = queue[: WebhookDispatcher._BatchSize(embed for embed, _ in queue)]
+            del queue[: len(batch)]
+
+            status: Optional[int] = await self._Send(
+                url, username, [embed for embed, _ in batch]
+            )
+
+            if WebhookDispatcher._Rejected(status) and len(batch) > 1:
+                # One invalid embed fails the whole message, so the others
+                # are sent on their own
+                logger.warning(f"Webhook message rejected, sending {len(batch)} embeds separately")
+
+                results: List[bool] = []
+
+                for embed, _ in batch:
+                    results.append(
+                        WebhookDispatcher._Success(await self._Send(url, username, [embed]))
+                    )
+            else:
+                results = [WebhookDispatcher._Success(status)] * len(batch)
+
+            for (_, future), success in zip(batch, results):
+                if success:
+                    self.sent += 1
+                else:
+                    self.failed += 1
+
+                if not future.done():
+                    future.set_result(success)
+
+    async def _Send(
+        self: Any, url: str, username: str, embeds: List[Dict[str, Any]]
+    ) -> Optional[int]:
+        """
+        POST one webhook message, honouring rate limits and retrying errors.
+        Return the final HTTP status, None if no response was received.
+        """
+
+        bucket: Bucket = self.buckets.setdefault(url, Bucket())
+        payload: Dict[str, Any] = {"username": username, "embeds": embeds}
+        status: Optional[int] = None
+
+        for attempt in range(1, self.maxAttempts + 1):
+            delay: float = bucket.Delay()
+
+            if delay > 0:
+                logger.debug(f"Webhook bucket exhausted, waiting {delay:.2f}s")
+
+                await asyncio.sleep(delay)
+
+            try:
+                res: Response = await pool.Async().post(
+                    url,
+                    content=json.dumps(payload),
+                    headers={"content-type": "application/json"},
+                )
+            except Exception as e:
+                logger.warning(f"POST {url} failed ({attempt}/{self.maxAttempts}), {e}")
+
+                self.retries += 1
+
+                await asyncio.sleep(self.backoff * attempt)
+
+                continue
+
+            bucket.Update(res)
+
+            status = res.status_code
+
+            if res.status_code == 429:
+                self.rateLimited += 1
+                self.retries += 1
+
+                retryAfter: float = WebhookDispatcher._RetryAfter(res)
+
+                logger.warning(f"POST {url} rate limited, retry in {retryAfter:.2f}s")
+
+                await asyncio.sleep(retryAfter)
+
+                continue
+
+            if res.is_success:
+                return status
+
+            if res.status_code < 500:
+                # Client errors will not succeed on retry
+                logger.warning(f"(HTTP {res.status_code}) POST {url} failed, {res.text}")
+
+                return status
+
+            logger.warning(
+                f"(HTTP {res.status_code}) POST {url} failed ({attempt}/{self.maxAttempts})"
+            )
+
+            self.retries += 1
+
+            await asyncio.sleep(self.backoff * attempt)
+
+        return status
+
+    @staticmethod
+    def _Success(status: Optional[int]) -> bool:
+        return status is not None and 200 <= status < 300
+
+    @staticmethod
+    def _Rejected(status: Optional[int]) -> bool:
+        """Return whether Discord refused the message itself, not its rate."""
+
+        return status is not None and 400 <= status < 500 and status != 429
+
+    @staticmethod
+    def _BatchSize(embeds: Iterable[Dict[str, Any]]) -> int:
+        """Return how many of the leading embeds fit into one message."""
+
+        count: int = 0
+        length: int = 0
+
+        for embed in embeds:
+            length += WebhookDispatcher._EmbedLength(embed)
+
+            # An oversized embed still goes out alone, to be rejected on its own
+            if count == MAX_EMBEDS or (count > 0 and length > MAX_EMBED_CHARS):
+                break
+
+            count += 1
+
+        return count
+
+    @staticmethod
+    def _EmbedLength(embed: Dict[str, Any]) -> int:
+        """Count the characters Discord adds up against the message limit."""
+
+        length: int = len(embed.get("title") or "") + len(embed.get("description") or "")
+
+        for field in embed.get("fields") or []:
+            length += len(field.get("name") or "") + len(field.get("value") or "")
+
+        length += len((embed.get("footer") or {}).get("text") or "")
+        length += len((embed.get("author") or {}).get("name") or "")
+
+        return length
+
+    @staticmethod
+    def _RetryAfter(res: Response) -> float:
+        """Read the retry delay of a 429 response in seconds."""
+
+        try:
+            return float(res.json()["retry_after"])
+        except Exception:
+            pass
+
+        try:
+            return float(res.headers.get("retry-after", 1.0))
+        except ValueError:
+            return 1.0
+
+
+# Process-wide dispatcher used by Renovate.Notify
+dispatcher: WebhookDispatcher = WebhookDispatcher()